@@ -1,437 +1,173 @@
 import streamlit as st
-import pandas as pd
-import sqlite3
 import datetime
-from fpdf import FPDF
-import os
-import base64
+import hmac
+import uuid
+import numpy as np
+
+from skyhawk.ativos import obter_ativo
+from skyhawk.banco import (init_db, salvar_venda, carregar_resumo, carregar_resumo_periodo, contratos_por_mes_inicio,
+                           faturamento_por_servico, listar_propostas, periodo_mes, tipos_contrato)
+from skyhawk.cache import cache_propostas, chave_proposta
+from skyhawk.carrinho import Carrinho
+from skyhawk.config import ARQUIVO_LOGO, TOKEN_ADMIN
+from skyhawk.exportacao import estado_snapshot, exportar_snapshot, faturamento_historico
+from skyhawk.fiscal import cenarios_fiscais_mensais, serie_receita_recorrente
+from skyhawk.importacao import importar_contratos
+from skyhawk.metricas import capturar_perfil, metricas
+from skyhawk.precos import carregar_catalogo, item_avulso, item_monitoramento, item_volumetria
+from skyhawk.propostas import gerar_proposta_html, gerar_proposta_pdf
+from skyhawk.relatorios import enviar_relatorio_geral
+from skyhawk.roi import gerar_analise_roi, grade_roi, monte_carlo_roi, superficie_roi
+from skyhawk.tarefas import CONCLUIDA, ERRO, fila_tarefas
 
 # =============================================================================
-# CONFIGURAÇÃO
+# CÁLCULOS EM CACHE (compartilhados entre execuções e sessões)
 # =============================================================================
-st.set_page_config(page_title="SkyHawk & Amazing CRM v33", layout="wide", page_icon="🚀")
+# Consultas ao banco levam a contagem do resumo na chave: ela muda a cada venda gravada
+@st.cache_data(max_entries=64, show_spinner=False)
+def receita_por_servico(qtd_propostas, inicio, fim):
+    return faturamento_por_servico(inicio, fim)
 
-PASTA_DO_SCRIPT = os.path.dirname(os.path.abspath(__file__))
-ARQUIVO_LOGO = os.path.join(PASTA_DO_SCRIPT, "logo_holding.png")
 
+@st.cache_data(max_entries=16, show_spinner=False)
+def cenario_fiscal(qtd_propostas, folha):
+    """Série recorrente (histórico + projeção) e cenário fiscal de cada mês."""
+    contratos = contratos_por_mes_inicio()
+    serie = serie_receita_recorrente(contratos['mes_inicio'], contratos['duracao_meses'],
+                                     contratos['fat_skyhawk'], contratos['fat_amazing'])
+    return cenarios_fiscais_mensais(serie, folha or None)
 
-# =============================================================================
-# FUNÇÕES AUXILIARES
-# =============================================================================
-def get_image_base64(path):
-    if not os.path.exists(path): return ""
-    try:
-        with open(path, "rb") as image_file:
-            return f"data:image/png;base64,{base64.b64encode(image_file.read()).decode()}"
-    except:
-        return ""
-
-
-def calcular_cenarios_fiscais_detalhado(faturamento_mensal, empresa_tipo):
-    faturamento_anual = faturamento_mensal * 12
-    analise = {}
-
-    if faturamento_anual <= 180000:
-        faixa = "1 (Até 180k)";
-        aliq_base = 0.06 if empresa_tipo == 'Engenharia' else 0.045
-    elif faturamento_anual <= 360000:
-        faixa = "2 (180k - 360k)";
-        aliq_base = 0.112 if empresa_tipo == 'Engenharia' else 0.09
-    elif faturamento_anual <= 720000:
-        faixa = "3 (360k - 720k)";
-        aliq_base = 0.135 if empresa_tipo == 'Engenharia' else 0.102
-    else:
-        faixa = "4+ (Acima de 720k)";
-        aliq_base = 0.16 if empresa_tipo == 'Engenharia' else 0.14
-
-    analise['faixa'] = faixa
-    analise['faturamento_anual'] = faturamento_anual
-    dicas = []
-
-    if empresa_tipo == "Seguranca":
-        analise['regime_provavel'] = "Simples Nacional - Anexo IV"
-        imposto_simples = faturamento_mensal * aliq_base
-        inss_patronal_est = faturamento_mensal * 0.40 * 0.20
-        analise['custo_total_est'] = imposto_simples + inss_patronal_est
-        dicas.append("ANÁLISE DE RISCO (ANEXO IV): Monitoramento paga INSS Patronal (20%) à parte.")
-        dicas.append("RECOMENDAÇÃO: Avaliar Lucro Presumido se a folha for alta.")
-
-    elif empresa_tipo == "Engenharia":
-        folha_necessaria = faturamento_mensal * 0.28
-        analise['regime_provavel'] = "Simples Nacional - Fator R"
-        imposto_anexo_iii = faturamento_mensal * aliq_base
-        imposto_anexo_v = faturamento_mensal * 0.155
-        analise['custo_total_est'] = imposto_anexo_iii
-        dicas.append(f"ESTRATÉGIA FATOR R: Mantenha folha acima de R$ {folha_necessaria:,.2f} (28%).")
-        dicas.append(f"ECONOMIA: Aprox. R$ {imposto_anexo_v - imposto_anexo_iii:,.2f} mensais vs Anexo V.")
-
-    analise['dicas'] = dicas
-    return analise
-
-
-def gerar_analise_roi(contrato_escolhido, total_mensal_escolhido, duracao):
-    analise = {}
-    custo_equipamento = 160000.00
-    gap_mensal_economia = 8000.00
-    meses_payback = custo_equipamento / gap_mensal_economia
-
-    if "Venda" in contrato_escolhido:
-        meses_lucro = duracao - meses_payback
-        if meses_lucro > 0:
-            lucro_projetado = meses_lucro * gap_mensal_economia
-            titulo = f"💰 Decisão Lucrativa: Economia de R$ {lucro_projetado:,.2f}"
-            texto_pdf = (
-                f"ANÁLISE DE LUCRO REAL: Esta modalidade é a mais rentável para {duracao} meses. "
-                f"O equipamento se paga no mês {int(meses_payback)}. Economia direta de R$ {lucro_projetado:,.2f}."
-            )
-        else:
-            titulo = "⚠️ Alerta de Viabilidade Financeira"
-            texto_pdf = (
-                f"ANÁLISE CRÍTICA: Para {duracao} meses, a aquisição não atinge o break-even (20 meses). "
-                "Comodato é mais seguro."
-            )
-        texto_html = f"<p style='color:#1b5e20'><b>{titulo}</b></p><p>{texto_pdf}</p>"
-    else:
-        if duracao >= 36:
-            lucro_perdido = (duracao - meses_payback) * gap_mensal_economia
-            titulo = "ℹ️ Análise Comparativa: Comodato vs Compra"
-            texto_pdf = (
-                f"ANÁLISE DE CENÁRIO: Comodato é seguro (Zero CAPEX). "
-                f"Porém, na Compra, o equipamento se pagaria no mês 20, gerando economia de R$ {lucro_perdido:,.2f}."
-            )
-        else:
-            titulo = "✅ Comodato: A Melhor Escolha para este Prazo"
-            texto_pdf = (
-                f"VEREDICTO: Para {duracao} meses, o Comodato é a única opção viável, "
-                "evitando imobilização de R$ 160k sem retorno."
-            )
-        texto_html = f"<p style='color:#1b5e20'><b>{titulo}</b></p><p>{texto_pdf}</p>"
 
-    analise['titulo'] = titulo
-    analise['texto'] = texto_html
-    analise['pdf_text'] = texto_pdf
-    return analise
+@st.cache_data(max_entries=4, show_spinner=False)
+def historico_snapshot(ultimo_id):
+    """Agregado do snapshot Parquet; o último id exportado identifica o conteúdo dos arquivos."""
+    return faturamento_historico()
 
 
-# =============================================================================
-# BANCO DE DADOS
-# =============================================================================
-def init_db():
-    conn = sqlite3.connect("skyhawk_v33.db")
-    cursor = conn.cursor()
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS propostas (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        cliente TEXT,
-        tipo_contrato TEXT,
-        duracao_meses INTEGER,
-        resumo_servicos TEXT,
-        valor_total REAL,
-        fat_amazing REAL,
-        fat_skyhawk REAL,
-        empresa_destino TEXT,
-        data_registro TEXT
-    )
-    """)
-    conn.commit()
-    conn.close()
-
-
-def salvar_venda(cliente, contrato, duracao, servicos, total, fat_amz, fat_sky, empresa):
-    conn = sqlite3.connect("skyhawk_v33.db")
-    cursor = conn.cursor()
-    data_hoje = datetime.datetime.now().strftime("%d/%m/%Y")
-    cursor.execute("""
-        INSERT INTO propostas (cliente, tipo_contrato, duracao_meses, resumo_servicos, valor_total, fat_amazing, fat_skyhawk, empresa_destino, data_registro)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-    """, (cliente, contrato, duracao, servicos, total, fat_amz, fat_sky, empresa, data_hoje))
-    conn.commit()
-    conn.close()
-
-
-def carregar_dados():
-    conn = sqlite3.connect("skyhawk_v33.db")
-    df = pd.read_sql_query("SELECT * FROM propostas", conn)
-    conn.close()
-    return df
-
-
-def calcular_totais(carrinho):
-    total = 0.0
-    fat_sky = 0.0
-    fat_amz = 0.0
-    for item in carrinho:
-        total += item['valor_total']
-        if "Monitoramento" in item['nome']:
-            fat_sky += item['valor_total']
-        else:
-            fat_amz += item['valor_total']
+@st.cache_data(max_entries=32, show_spinner=False)
+def sensibilidade_roi(custos, gaps, duracao):
+    """Superfícies de saldo projetado e payback para as faixas de custo e economia dos sliders."""
+    grade = grade_roi(np.arange(custos[0], custos[1] + 1, 10000), np.arange(gaps[0], gaps[1] + 1, 1000),
+                      range(12, 61, 12))
+    return superficie_roi(grade, 'saldo_projetado', duracao).round(0), superficie_roi(grade, 'meses_payback').round(1)
 
-    if fat_sky > 0 and fat_amz > 0:
-        empresa = "CONTRATO HÍBRIDO"
-    elif fat_amz > 0:
-        empresa = "AmazingDrone Solutions"
-    else:
-        empresa = "SkyHawk Security"
-    return total, fat_sky, fat_amz, empresa
+
+@st.cache_data(max_entries=32, show_spinner=False)
+def simulacao_monte_carlo(desvio):
+    return monte_carlo_roi(gap_desvio=desvio, semente=42).round(3)
 
 
 # =============================================================================
-# GERADORES DE PDF (COM CORREÇÃO DE POSICIONAMENTO)
+# INTERFACE PRINCIPAL
 # =============================================================================
-def gerar_proposta_pdf(cliente, contrato, duracao, carrinho, total, roi_data):
-    pdf = FPDF()
-    pdf.add_page()
-
-    # --- CORREÇÃO DE POSICIONAMENTO ---
-    if os.path.exists(ARQUIVO_LOGO):
-        # Logo em Y=10, largura 100
-        pdf.image(ARQUIVO_LOGO, x=55, y=10, w=100)
-
-    # Aumentado o espaço vertical para 65 (antes era 50) para evitar sobreposição
-    pdf.set_y(65)
-
-    pdf.set_font("Arial", 'B', 16)
-    pdf.cell(0, 10, "PROPOSTA COMERCIAL INTEGRADA", 0, 1, 'C')
-    pdf.set_font("Arial", 'I', 10)
-    pdf.cell(0, 5, "Amazing SkyHawk Holding", 0, 1, 'C')
-    pdf.ln(10)
-
-    pdf.set_font("Arial", 'B', 11)
-    pdf.cell(0, 8, f"Cliente: {cliente}", 0, 1)
-    pdf.set_font("Arial", '', 11)
-    pdf.cell(0, 8, f"Modalidade: {contrato} | Vigência: {duracao} meses", 0, 1)
-
-    pdf.ln(5)
-    pdf.set_fill_color(240, 240, 240)
-    pdf.rect(10, pdf.get_y(), 190, 45, 'F')
-    pdf.set_xy(15, pdf.get_y() + 5)
-    pdf.set_font("Arial", 'B', 10)
-    pdf.cell(0, 6, "Analise de Viabilidade & Recomendacao:", 0, 1)
-    pdf.set_font("Arial", '', 9)
-    pdf.multi_cell(180, 5, roi_data['pdf_text'])
-
-    pdf.ln(15)
-    pdf.set_font("Arial", 'B', 10)
-    pdf.set_fill_color(0, 77, 64);
-    pdf.set_text_color(255, 255, 255)
-    pdf.cell(110, 10, "Servico", 1, 0, 'L', True)
-    pdf.cell(30, 10, "Qtd", 1, 0, 'C', True)
-    pdf.cell(50, 10, "Total (R$)", 1, 1, 'R', True)
-
-    pdf.set_text_color(0, 0, 0);
-    pdf.set_font("Arial", '', 10)
-    for item in carrinho:
-        pdf.cell(110, 10, item['nome'][:55], 1)
-        pdf.cell(30, 10, f"{item['qtd']} {item['unidade']}", 1, 0, 'C')
-        pdf.cell(50, 10, f"{item['valor_total']:,.2f}", 1, 1, 'R')
-
-    pdf.ln(5)
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, f"Total Mensal: R$ {total:,.2f}", 0, 1, 'R')
-
-    pdf.set_y(-45);
-    y_sig = pdf.get_y();
-    pdf.set_font("Arial", '', 8)
-    pdf.line(10, y_sig, 65, y_sig);
-    pdf.text(15, y_sig + 5, "Diretoria SkyHawk Security")
-    pdf.line(75, y_sig, 130, y_sig);
-    pdf.text(80, y_sig + 5, "Engenharia AmazingDrone")
-    pdf.line(140, y_sig, 195, y_sig);
-    pdf.text(145, y_sig + 5, "De Acordo (Cliente)")
-
-    return pdf.output(dest='S').encode('latin-1')
-
-
-def gerar_relatorio_geral_completo_pdf(df):
-    pdf = FPDF()
-    pdf.add_page()
-
-    # --- CORREÇÃO DE POSICIONAMENTO ---
-    if os.path.exists(ARQUIVO_LOGO):
-        pdf.image(ARQUIVO_LOGO, x=55, y=10, w=100)
-
-    # Aumentado o espaço vertical para 65
-    pdf.set_y(65)
-
-    pdf.set_font("Arial", 'B', 18)
-    pdf.cell(0, 10, "RELATÓRIO GERAL DE INTELIGÊNCIA", 0, 1, 'C')
-    pdf.set_font("Arial", '', 10)
-    pdf.cell(0, 5, f"Data: {datetime.datetime.now().strftime('%d/%m/%Y')} | Holding Consolidada", 0, 1, 'C')
-    pdf.ln(10)
-
-    total_geral = df['valor_total'].sum()
-    total_sky = df['fat_skyhawk'].sum()
-    total_amz = df['fat_amazing'].sum()
-
-    analise_sky = calcular_cenarios_fiscais_detalhado(total_sky, "Seguranca")
-    analise_amz = calcular_cenarios_fiscais_detalhado(total_amz, "Engenharia")
-
-    pdf.set_fill_color(240, 240, 240)
-    pdf.rect(10, pdf.get_y(), 190, 30, 'F')
-    y_start = pdf.get_y()
-
-    pdf.set_xy(10, y_start + 5)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(63, 10, "FATURAMENTO HOLDING", 0, 0, 'C')
-    pdf.cell(63, 10, "SKYHAWK", 0, 0, 'C')
-    pdf.cell(63, 10, "AMAZING", 0, 1, 'C')
-
-    pdf.set_font("Arial", 'B', 14);
-    pdf.set_text_color(0, 77, 64)
-    pdf.cell(63, 10, f"R$ {total_geral:,.2f}", 0, 0, 'C')
-    pdf.set_text_color(0, 0, 0)
-    pdf.cell(63, 10, f"R$ {total_sky:,.2f}", 0, 0, 'C')
-    pdf.cell(63, 10, f"R$ {total_amz:,.2f}", 0, 1, 'C')
-    pdf.ln(15)
-
-    pdf.set_font("Arial", 'B', 14)
-    pdf.cell(0, 10, "ESTRATEGIA TRIBUTARIA E ELISAO FISCAL", 0, 1, 'L')
-    pdf.ln(2)
-
-    pdf.set_fill_color(224, 242, 241)
-    pdf.rect(10, pdf.get_y(), 190, 55, 'F')
-    pdf.set_xy(15, pdf.get_y() + 5)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(0, 6, f"1. SKYHAWK SECURITY (Recorrencia: R$ {total_sky:,.2f}/mes)", 0, 1)
-    pdf.set_font("Arial", '', 9)
-    pdf.cell(0, 5,
-             f"Estimativa Anual: R$ {analise_sky['faturamento_anual']:,.2f} | Regime: {analise_sky['regime_provavel']}",
-             0, 1)
-    pdf.ln(2)
-    pdf.set_font("Arial", 'B', 9)
-    pdf.cell(0, 5, "Analise de Otimizacao:", 0, 1)
-    pdf.set_font("Arial", '', 9)
-    for dica in analise_sky['dicas']:
-        pdf.multi_cell(180, 5, f"- {dica}")
-    pdf.ln(5)
-
-    pdf.set_fill_color(255, 243, 224)
-    pdf.rect(10, pdf.get_y(), 190, 55, 'F')
-    pdf.set_xy(15, pdf.get_y() + 5)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(0, 6, f"2. AMAZING DRONE SOLUTIONS (Recorrencia: R$ {total_amz:,.2f}/mes)", 0, 1)
-    pdf.set_font("Arial", '', 9)
-    pdf.cell(0, 5,
-             f"Estimativa Anual: R$ {analise_amz['faturamento_anual']:,.2f} | Regime: {analise_amz['regime_provavel']}",
-             0, 1)
-    pdf.ln(2)
-    pdf.set_font("Arial", 'B', 9)
-    pdf.cell(0, 5, "Analise de Otimizacao (Fator R):", 0, 1)
-    pdf.set_font("Arial", '', 9)
-    for dica in analise_amz['dicas']:
-        pdf.multi_cell(180, 5, f"- {dica}")
-
-    pdf.ln(10)
-    pdf.set_font("Arial", 'B', 12)
-    pdf.cell(0, 10, "Detalhamento de Contratos", 0, 1, 'L')
-    pdf.set_font("Arial", 'B', 8)
-    pdf.set_fill_color(0, 77, 64);
-    pdf.set_text_color(255, 255, 255)
-    pdf.cell(10, 8, "ID", 1, 0, 'C', True)
-    pdf.cell(50, 8, "Cliente", 1, 0, 'C', True)
-    pdf.cell(25, 8, "Contrato", 1, 0, 'C', True)
-    pdf.cell(30, 8, "Total", 1, 0, 'C', True)
-    pdf.cell(37.5, 8, "Fat. Sky", 1, 0, 'C', True)
-    pdf.cell(37.5, 8, "Fat. Amz", 1, 1, 'C', True)
-
-    pdf.set_font("Arial", '', 8);
-    pdf.set_text_color(0, 0, 0)
-    for index, row in df.iterrows():
-        pdf.cell(10, 8, str(row['id']), 1, 0, 'C')
-        pdf.cell(50, 8, str(row['cliente'])[:25], 1, 0, 'C')
-        pdf.cell(25, 8, str(row['tipo_contrato']).split(' ')[0], 1, 0, 'C')
-        pdf.cell(30, 8, f"{row['valor_total']:,.2f}", 1, 0, 'C')
-        pdf.cell(37.5, 8, f"{row['fat_skyhawk']:,.2f}", 1, 0, 'C')
-        pdf.cell(37.5, 8, f"{row['fat_amazing']:,.2f}", 1, 1, 'C')
-
-    return pdf.output(dest='S').encode('latin-1')
-
-
-def gerar_proposta_html(cliente, contrato, duracao, carrinho, total, roi_data):
-    img_b64 = get_image_base64(ARQUIVO_LOGO)
-    img_tag = f'<img src="{img_b64}" class="logo-img">' if img_b64 else ''
-    itens_html = ""
-    for item in carrinho:
-        desc_extra = ""
-        if "Monitoramento" in item['nome']:
-            extras = item['qtd'] - 3
-            desc = "(Base 3 Rondas)"
-            if extras > 0: desc = f"(Base 3 Rondas + {extras} Extras)"
-            desc_extra = f"<br><small>{desc}</small>"
-        itens_html += f"<tr><td>{item['nome']} <small>({item['qtd']} {item['unidade']})</small>{desc_extra}</td><td style='text-align:right'>R$ {item['valor_total']:.2f}</td></tr>"
-
-    html = f"""
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <style>
-            body {{ font-family: 'Helvetica', sans-serif; padding: 40px; color: #333; }}
-            .header-container {{ text-align: center; border-bottom: 4px solid #004d40; padding-bottom: 20px; }}
-            .logo-img {{ height: 120px; width: auto; object-fit: contain; }}
-            .roi-box {{ background-color: #f1f8e9; padding: 25px; border-left: 6px solid #33691e; margin: 30px 0; border-radius: 8px; }}
-            table {{ width: 100%; border-collapse: collapse; margin-top: 25px; }}
-            th {{ background-color: #004d40; color: white; padding: 15px; text-align: left; }}
-            td {{ border-bottom: 1px solid #ddd; padding: 15px; }}
-            .total {{ text-align: right; font-size: 28px; font-weight: bold; margin-top: 30px; color: #004d40; }}
-            .footer {{ margin-top: 50px; text-align: center; color: #888; font-size: 12px; }}
-            .signatures {{ margin-top: 80px; display: flex; justify-content: space-between; }}
-            .sig-line {{ width: 30%; border-top: 1px solid #333; text-align: center; font-size: 12px; padding-top: 10px; font-weight: bold; }}
-        </style>
-    </head>
-    <body>
-        <div class="header-container">
-            {img_tag}
-            <h1 style="margin:15px 0 0 0; color:#004d40; font-size:24px;">PROPOSTA TÉCNICA E COMERCIAL</h1>
-        </div>
-        <div style="margin-top: 30px;">
-            <p><strong>Cliente:</strong> {cliente}</p>
-            <p><strong>Modalidade:</strong> {contrato}</p>
-            <p><strong>Vigência:</strong> {duracao} Meses</p>
-        </div>
-        <div class="roi-box">
-            <h3 style="margin-top:0; color:#1b5e20">{roi_data['titulo']}</h3>
-            {roi_data['texto']}
-        </div>
-        <h3 style="color:#004d40; border-bottom: 2px solid #eee; padding-bottom: 10px;">Detalhamento Financeiro</h3>
-        <table>
-            <tr><th>Descrição do Serviço</th><th style="text-align:right">Investimento Mensal</th></tr>
-            {itens_html}
-        </table>
-        <div class="total">Total Mensal: R$ {total:,.2f}</div>
-        <div class="signatures">
-            <div class="sig-line">Diretoria<br>SkyHawk Security</div>
-            <div class="sig-line">Engenharia<br>AmazingDrone</div>
-            <div class="sig-line">De Acordo<br>{cliente}</div>
-        </div>
-        <div class="footer"><p>Proposta válida por 10 dias úteis. Operações homologadas DECEA/ANAC.</p></div>
-    </body>
-    </html>
+def selecionar_periodo():
+    """Filtro de período dos relatórios; devolve (inicio, fim) para as consultas indexadas."""
+    hoje = datetime.date.today()
+    opcao = st.radio("Período", ["Todo o histórico", "Este mês", "Mês", "Intervalo"], horizontal=True)
+    if opcao == "Este mês":
+        return periodo_mes(hoje.year, hoje.month)
+    if opcao == "Mês":
+        meses = [((hoje.month - 1 - i) // 12 + hoje.year, (hoje.month - 1 - i) % 12 + 1) for i in range(36)]
+        ano, mes = st.selectbox("Mês de referência", meses, format_func=lambda am: f"{am[1]:02d}/{am[0]}")
+        return periodo_mes(ano, mes)
+    if opcao == "Intervalo":
+        datas = st.date_input("Intervalo", (hoje.replace(day=1), hoje))
+        if len(datas) == 2:
+            return datas[0], datas[1] + datetime.timedelta(days=1)
+    return None, None
+
+
+@st.fragment
+def navegador_contratos(inicio, fim, empresas):
+    """Contratos página a página; filtros e ordenação rodam no SQLite.
+
+    É um fragmento: filtros e troca de página reexecutam só o navegador, não o
+    relatório inteiro. Os botões mexem na pilha de cursores pelo ``on_click``,
+    antes dessa reexecução, então não precisam de ``st.rerun``.
     """
-    return html
+    st.subheader("Contratos")
+    f1, f2, f3 = st.columns([2, 1, 1])
+    cliente = f1.text_input("Cliente contém")
+    tipo = f2.selectbox("Tipo de contrato", ["Todos"] + tipos_contrato())
+    empresa = f3.selectbox("Empresa", ["Todas"] + list(empresas))
+    o1, o2, o3 = st.columns([2, 1, 1])
+    ordenacoes = {"Data de registro": "registrado_em", "Valor total": "valor_total", "Cliente": "cliente", "ID": "id"}
+    ordenar_por = ordenacoes[o1.selectbox("Ordenar por", list(ordenacoes))]
+    decrescente = o2.radio("Ordem", ["Decrescente", "Crescente"], horizontal=True) == "Decrescente"
+    tamanho = o3.selectbox("Por página", [25, 50, 100], index=1)
+
+    filtros = dict(cliente=cliente.strip() or None, tipo_contrato=None if tipo == "Todos" else tipo,
+                   empresa=None if empresa == "Todas" else empresa, inicio=inicio, fim=fim,
+                   ordenar_por=ordenar_por, decrescente=decrescente, tamanho_pagina=tamanho)
+    # Pilha de cursores das páginas já vistas; filtros novos voltam para a primeira página
+    if st.session_state.get('navegador_filtros') != filtros:
+        st.session_state['navegador_filtros'] = filtros
+        st.session_state['navegador_cursores'] = [None]
+    cursores = st.session_state['navegador_cursores']
+
+    pagina, proximo = listar_propostas(apos=cursores[-1], **filtros)
+    st.dataframe(pagina, use_container_width=True, hide_index=True)
+    p1, p2, p3 = st.columns([1, 2, 1])
+    p1.button("◀ Anterior", disabled=len(cursores) == 1, on_click=cursores.pop)
+    p2.caption(f"Página {len(cursores)} · {len(pagina)} contrato(s)")
+    p3.button("Próxima ▶", disabled=proximo is None, on_click=cursores.append, args=(proximo,))
+
+
+def painel_desempenho():
+    """Latência por operação e perfil cProfile sob demanda; só com o token de administrador."""
+    if not TOKEN_ADMIN:
+        return
+    with st.sidebar.expander("⏱️ Desempenho (admin)"):
+        token = st.text_input("Token de administrador", type="password")
+        if not hmac.compare_digest(token.encode(), TOKEN_ADMIN.encode()):
+            return
+        linhas = metricas.resumo()
+        if linhas:
+            colunas_ms = ("total_ms", "media_ms", "p50_ms", "p95_ms", "max_ms")
+            st.dataframe(linhas, hide_index=True, use_container_width=True,
+                         column_config={c: st.column_config.NumberColumn(format="%.1f") for c in colunas_ms})
+        else:
+            st.caption("Nenhuma operação medida ainda.")
+        d1, d2 = st.columns(2)
+        d1.download_button("JSON", metricas.como_json(), "metricas.json", "application/json")
+        d2.download_button("Prometheus", metricas.como_prometheus(), "metricas.prom", "text/plain")
+        if st.button("Zerar métricas"):
+            metricas.limpar(); st.rerun()
+        if st.button("🔬 Perfilar a próxima execução"):
+            st.session_state['perfilar_execucao'] = True; st.rerun()
+        perfil = st.session_state.get('perfil_execucao')
+        if perfil:
+            st.download_button("Baixar perfil (texto)", perfil, "perfil.txt", "text/plain")
+            st.code(perfil, language=None)
+
+
+@st.fragment(run_every=1.0)
+def acompanhar_tarefa(id_tarefa, texto):
+    """Barra de progresso de uma tarefa em segundo plano; recarrega a página quando ela termina."""
+    tarefa = fila_tarefas.obter(id_tarefa)
+    if tarefa is None or tarefa.terminada:
+        st.rerun()
+    st.progress(tarefa.progresso, text=f"{texto} ({tarefa.estado}, tarefa {tarefa.id[:8]})")
 
 
-# =============================================================================
-# INTERFACE PRINCIPAL
-# =============================================================================
 def main():
+    st.set_page_config(page_title="SkyHawk & Amazing CRM v33", layout="wide", page_icon="🚀")
     init_db()
-    if 'carrinho' not in st.session_state: st.session_state['carrinho'] = []
+    if 'carrinho' not in st.session_state: st.session_state['carrinho'] = Carrinho()
+    # Chave de idempotência do carrinho: cliques repetidos em "Fechar Contrato" gravam uma vez só
+    if 'chave_carrinho' not in st.session_state: st.session_state['chave_carrinho'] = uuid.uuid4().hex
 
     with st.sidebar:
-        if os.path.exists(ARQUIVO_LOGO):
-            img_b64 = get_image_base64(ARQUIVO_LOGO)
-            if img_b64:
-                st.markdown(
-                    f"""
-                    <div style="background-color: white; padding: 30px 10px; border-radius: 12px; text-align: center; margin-bottom: 25px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
-                        <img src="{img_b64}" style="max-width: 90%; height: auto;">
-                    </div>
-                    """,
-                    unsafe_allow_html=True
-                )
-            else:
-                st.image(ARQUIVO_LOGO, use_container_width=True)
+        logo = obter_ativo(ARQUIVO_LOGO)
+        if logo:
+            st.markdown(
+                f"""
+                <div style="background-color: white; padding: 30px 10px; border-radius: 12px; text-align: center; margin-bottom: 25px; box-shadow: 0 2px 5px rgba(0,0,0,0.1);">
+                    <img src="{logo.data_uri}" style="max-width: 90%; height: auto;">
+                </div>
+                """,
+                unsafe_allow_html=True
+            )
         else:
             st.warning("Logo não encontrada")
 
@@ -451,121 +187,168 @@ def main():
 
             st.subheader("2. Seleção de Serviços")
             with st.container(border=True):
-                servico = st.selectbox("Serviço", ["Monitoramento", "Volumetria", "Inspeções", "Mapeamento"])
+                catalogo = carregar_catalogo()
+                servico = st.selectbox("Serviço", list(catalogo.servicos))
 
                 if servico == "Monitoramento":
-                    if "Comodato" in contrato:
-                        tipo_preco = "Comodato"
-                        if duracao == 12:
-                            preco_base = 46000.00;
-                            label_duracao = "1 Ano (Alto Risco + 30% Margem)"
-                        elif duracao == 24:
-                            preco_base = 34000.00;
-                            label_duracao = "2 Anos"
-                        elif duracao == 36:
-                            preco_base = 30000.00;
-                            label_duracao = "3 Anos (Padrão)"
-                        elif duracao == 48:
-                            preco_base = 28000.00;
-                            label_duracao = "4 Anos"
-                        else:
-                            preco_base = 26000.00;
-                            label_duracao = "5 Anos"
-                    else:
-                        tipo_preco = "SaaS (Venda)"
-                        if duracao == 12:
-                            preco_base = 26000.00;
-                            label_duracao = "1 Ano"
-                        elif duracao == 24:
-                            preco_base = 24000.00;
-                            label_duracao = "2 Anos"
-                        elif duracao == 36:
-                            preco_base = 22000.00;
-                            label_duracao = "3 Anos (Padrão)"
-                        elif duracao == 48:
-                            preco_base = 20500.00;
-                            label_duracao = "4 Anos"
-                        else:
-                            preco_base = 19000.00;
-                            label_duracao = "5 Anos"
-
+                    tipo_preco, preco_base, label_duracao = catalogo.preco_base(servico, contrato, duracao)
                     st.info(f"ℹ️ **Tabela {tipo_preco} - {label_duracao}:** R$ {preco_base:,.2f}")
-                    rondas_extras = st.number_input("Rondas Extras (3 inclusas)", 0, 50, 0)
-                    valor_calc = preco_base + (rondas_extras * 850.00)
-                    qtd_tot = 3 + rondas_extras
-                    st.write(f"Total Mensal: **R$ {valor_calc:,.2f}**")
+                    inclusas = catalogo.servicos[servico]['rondas_inclusas']
+                    rondas_extras = st.number_input(f"Rondas Extras ({inclusas} inclusas)", 0, 50, 0)
+                    item = item_monitoramento(contrato, duracao, rondas_extras, catalogo)
+                    st.write(f"Total Mensal: **R$ {item.valor_total:,.2f}**")
                     if st.button("Adicionar Monitoramento"):
-                        st.session_state['carrinho'].append(
-                            {"nome": f"Monitoramento {tipo_preco} ({label_duracao})", "qtd": qtd_tot,
-                             "unidade": "rondas", "valor_unit": valor_calc / qtd_tot, "valor_total": valor_calc})
+                        st.session_state['carrinho'].adicionar(item)
                         st.rerun()
 
                 elif servico == "Volumetria":
                     c1, c2 = st.columns(2)
                     qv = c1.number_input("Qtd Vols", 1, 100, 1)
                     qb = c2.number_input("Qtd Bat", 1, 50, 4)
-                    val = qv * qb * 2000
-                    st.write(f"Total: R$ {val:,.2f}")
-                    if st.button("Adicionar Volumetria"): st.session_state['carrinho'].append(
-                        {"nome": f"Volumetria ({qb} Bat)", "qtd": qv, "unidade": "vols", "valor_unit": val / qv,
-                         "valor_total": val}); st.rerun()
+                    item = item_volumetria(qv, qb, catalogo)
+                    st.write(f"Total: R$ {item.valor_total:,.2f}")
+                    if st.button("Adicionar Volumetria"): st.session_state['carrinho'].adicionar(item); st.rerun()
                 else:
                     c1, c2 = st.columns(2)
                     q = c1.number_input("Qtd", 1, 100, 1)
                     v = c2.number_input("Valor", 0.0, step=100.0)
-                    if st.button(f"Adicionar {servico}"): st.session_state['carrinho'].append(
-                        {"nome": servico, "qtd": q, "unidade": "unid", "valor_unit": v,
-                         "valor_total": q * v}); st.rerun()
+                    if st.button(f"Adicionar {servico}"):
+                        st.session_state['carrinho'].adicionar(item_avulso(servico, q, v, catalogo)); st.rerun()
 
         with col2:
             st.subheader("3. Fechamento")
             if st.session_state['carrinho']:
                 for i, item in enumerate(st.session_state['carrinho']):
                     c1, c2, c3 = st.columns([3, 2, 1])
-                    c1.write(f"**{item['nome']}**");
-                    c2.write(f"R$ {item['valor_total']:,.2f}")
-                    if c3.button("🗑️", key=f"del_{i}"): st.session_state['carrinho'].pop(i); st.rerun()
+                    c1.write(f"**{item.nome}**");
+                    c2.write(f"R$ {item.valor_total:,.2f}")
+                    if c3.button("🗑️", key=f"del_{i}"): st.session_state['carrinho'].remover(i); st.rerun()
 
-                total, _, _, _ = calcular_totais(st.session_state['carrinho'])
+                total = st.session_state['carrinho'].total
                 roi = gerar_analise_roi(contrato, total, duracao)
                 st.success(f"Total Mensal: R$ {total:,.2f}")
 
+                with st.expander("📈 Sensibilidade do ROI (Compra do Equipamento)"):
+                    r1, r2 = st.columns(2)
+                    custos = r1.slider("Custo do equipamento (R$)", 50000, 400000, (120000, 200000), step=10000)
+                    gaps = r2.slider("Economia mensal (R$)", 1000, 20000, (4000, 12000), step=1000)
+                    saldo, payback = sensibilidade_roi(custos, gaps, duracao)
+                    st.caption(f"Saldo ao fim de {duracao} meses (custo x economia mensal)")
+                    st.dataframe(saldo, use_container_width=True)
+                    st.caption("Payback (meses)")
+                    st.dataframe(payback, use_container_width=True)
+                    desvio = st.slider("Incerteza da economia mensal (desvio padrão, R$)", 0, 6000, 2000, step=500)
+                    st.caption("Monte Carlo (20.000 cenários)")
+                    st.dataframe(simulacao_monte_carlo(desvio), use_container_width=True, hide_index=True)
+
                 c1, c2 = st.columns(2)
                 if cliente:
-                    pdf = gerar_proposta_pdf(cliente, contrato, duracao, st.session_state['carrinho'], total, roi)
+                    carrinho = st.session_state['carrinho']
+                    pdf = cache_propostas.obter(
+                        chave_proposta("pdf", cliente, contrato, duracao, carrinho, total, roi),
+                        lambda: gerar_proposta_pdf(cliente, contrato, duracao, carrinho, total, roi))
                     c1.download_button("📄 PDF Proposta", pdf, "Proposta.pdf", "application/pdf")
-                    html = gerar_proposta_html(cliente, contrato, duracao, st.session_state['carrinho'], total, roi)
+                    html = cache_propostas.obter(
+                        chave_proposta("html", cliente, contrato, duracao, carrinho, total, roi),
+                        lambda: gerar_proposta_html(cliente, contrato, duracao, carrinho, total, roi))
                     c2.download_button("🌐 HTML Proposta", html, "Proposta.html", "text/html")
 
                 if st.button("💾 Fechar Contrato", type="primary"):
-                    _, fs, fa, emp = calcular_totais(st.session_state['carrinho'])
-                    res = ", ".join([x['nome'] for x in st.session_state['carrinho']])
-                    salvar_venda(cliente, contrato, duracao, res, total, fa, fs, emp)
+                    carrinho = st.session_state['carrinho']
+                    res = ", ".join([x.nome for x in carrinho])
+                    salvar_venda(cliente, contrato, duracao, res, total, carrinho.fat_amz, carrinho.fat_sky,
+                                 carrinho.empresa, carrinho, chave_idempotencia=st.session_state['chave_carrinho'])
                     st.success("Salvo!");
-                    st.session_state['carrinho'] = [];
+                    st.session_state['carrinho'] = Carrinho();
+                    st.session_state['chave_carrinho'] = uuid.uuid4().hex
                     st.rerun()
 
     elif menu == "Relatórios Gerenciais":
         st.title("📊 Inteligência Contábil & Vendas")
-        df = carregar_dados()
 
-        if not df.empty:
-            total_geral = df['valor_total'].sum()
-            total_sky = df['fat_skyhawk'].sum()
-            total_amz = df['fat_amazing'].sum()
+        with st.expander("📥 Importar Contratos Históricos (CSV/XLSX)"):
+            st.caption("Uma linha por item: cliente, contrato, duracao, data, servico, valor_total (qtd e unidade opcionais).")
+            planilha = st.file_uploader("Planilha de contratos", type=["csv", "xlsx"])
+            simulacao = st.checkbox("Apenas validar (simulação)", value=True)
+            if planilha is not None and st.button("Importar"):
+                try:
+                    resultado = importar_contratos(planilha, planilha.name, simulacao=simulacao)
+                except (ImportError, ValueError) as erro:
+                    st.error(str(erro))
+                else:
+                    if simulacao:
+                        st.info(f"{resultado['contratos']} contrato(s) válidos em {resultado['linhas']} linha(s). Nada foi gravado.")
+                    else:
+                        st.success(f"{resultado['importados']} contrato(s) importados de {resultado['linhas']} linha(s).")
+                    if resultado['rejeitadas']:
+                        st.warning(f"{len(resultado['rejeitadas'])} linha(s) rejeitadas")
+                        st.dataframe([{"linha": linha, "motivo": motivo} for linha, motivo in resultado['rejeitadas']],
+                                     use_container_width=True, hide_index=True)
+
+        resumo = carregar_resumo()
+        qtd_propostas = resumo['qtd_propostas']
+
+        if qtd_propostas:
+            inicio, fim = selecionar_periodo()
+            if inicio is not None:
+                resumo = carregar_resumo_periodo(inicio, fim)
 
             c1, c2, c3 = st.columns(3)
-            c1.metric("Faturamento Total", f"R$ {total_geral:,.2f}")
-            c2.metric("SkyHawk", f"R$ {total_sky:,.2f}")
-            c3.metric("Amazing", f"R$ {total_amz:,.2f}")
-
-            st.dataframe(df, use_container_width=True)
-            pdf_completo = gerar_relatorio_geral_completo_pdf(df)
-            st.download_button("📥 Baixar Relatório Geral Completo (PDF)", pdf_completo, "Relatorio_Geral_Completo.pdf",
-                               "application/pdf", type="primary")
+            c1.metric("Faturamento Total", f"R$ {resumo['total_geral']:,.2f}")
+            c2.metric("SkyHawk", f"R$ {resumo['total_skyhawk']:,.2f}")
+            c3.metric("Amazing", f"R$ {resumo['total_amazing']:,.2f}")
+            st.caption(" | ".join(f"{emp}: {qtd} contrato(s)" for emp, qtd in resumo['por_empresa'].items()))
+
+            st.subheader("Receita por Serviço")
+            st.dataframe(receita_por_servico(qtd_propostas, inicio, fim), use_container_width=True, hide_index=True)
+
+            with st.expander("🧾 Cenário Fiscal Mês a Mês (histórico + projeção)"):
+                folha = st.number_input("Folha mensal AmazingDrone (opcional, para o Fator R)", 0.0, step=1000.0)
+                cenarios = cenario_fiscal(qtd_propostas, folha)
+                st.dataframe(cenarios[['mes', 'empresa', 'projetado', 'faturamento_mensal', 'faixa', 'aliquota',
+                                       'custo_total_est', 'economia_anexo_iii_vs_v', 'fator_r', 'folha_faltante']],
+                             use_container_width=True, hide_index=True)
+
+            navegador_contratos(inicio, fim, resumo['por_empresa'])
+
+            with st.expander("📦 Histórico Analítico (snapshot Parquet)"):
+                try:
+                    if st.button("Exportar vendas novas"):
+                        st.success(f"{exportar_snapshot()} contrato(s) novo(s) exportados.")
+                    estado = estado_snapshot()
+                    st.caption(f"Snapshot com {estado['linhas']} contrato(s), até o id {estado['ultimo_id']}. "
+                               "A tabela lê os arquivos Parquet, não o banco transacional.")
+                    historico = None
+                    if st.toggle("Carregar histórico do snapshot"):
+                        historico = historico_snapshot(estado['ultimo_id'])
+                except ImportError as erro:
+                    st.info(str(erro))
+                else:
+                    if historico is not None:
+                        st.dataframe(historico, use_container_width=True, hide_index=True)
+            tarefa = enviar_relatorio_geral()
+            if tarefa.estado == CONCLUIDA:
+                with open(tarefa.resultado, 'rb') as pdf_completo:
+                    st.download_button("📥 Baixar Relatório Geral Completo (PDF)", pdf_completo,
+                                       "Relatorio_Geral_Completo.pdf", "application/pdf", type="primary")
+            elif tarefa.estado == ERRO:
+                st.error(f"Falha ao gerar o relatório geral: {tarefa.erro}")
+                st.button("🔄 Tentar novamente", on_click=fila_tarefas.descartar, args=(tarefa.chave,))
+            else:
+                acompanhar_tarefa(tarefa.id, "Gerando o relatório geral")
         else:
             st.info("Nenhuma venda registrada ainda.")
 
 
 if __name__ == "__main__":
-    main()
+    # Perfil cProfile de uma única execução, pedido pelo painel de desempenho
+    if st.session_state.pop('perfilar_execucao', False):
+        try:
+            with capturar_perfil() as perfil:
+                main()
+        finally:
+            # Também quando main() sai por st.rerun()/st.stop() (exceções de controle do Streamlit)
+            st.session_state['perfil_execucao'] = perfil['texto']
+    else:
+        main()
+    painel_desempenho()
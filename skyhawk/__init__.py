@@ -0,0 +1,41 @@
+"""Núcleo de negócio do CRM Amazing SkyHawk Holding.
+
+Importável sem Streamlit. Os nomes abaixo são resolvidos sob demanda, e
+pandas e fpdf só são carregados quando uma função que precisa deles roda.
+"""
+import importlib
+
+_EXPORTS = {
+    "Carrinho": "skyhawk.carrinho",
+    "calcular_totais": "skyhawk.carrinho",
+    "cotar": "skyhawk.precos",
+    "cotar_lote": "skyhawk.precos",
+    "carregar_catalogo": "skyhawk.precos",
+    "calcular_cenarios_fiscais_detalhado": "skyhawk.fiscal",
+    "calcular_cenarios_fiscais_lote": "skyhawk.fiscal",
+    "gerar_analise_roi": "skyhawk.roi",
+    "simular_roi": "skyhawk.roi",
+    "init_db": "skyhawk.banco",
+    "salvar_venda": "skyhawk.banco",
+    "carregar_dados": "skyhawk.banco",
+    "carregar_resumo": "skyhawk.banco",
+    "gerar_proposta_pdf": "skyhawk.propostas",
+    "gerar_proposta_html": "skyhawk.propostas",
+    "relatorio_geral_atualizado": "skyhawk.relatorios",
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(nome):
+    try:
+        modulo = _EXPORTS[nome]
+    except KeyError:
+        raise AttributeError(f"module 'skyhawk' has no attribute {nome!r}") from None
+    valor = getattr(importlib.import_module(modulo), nome)
+    globals()[nome] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_EXPORTS))
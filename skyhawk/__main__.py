@@ -0,0 +1,5 @@
+import sys
+
+from skyhawk.cli import main
+
+sys.exit(main())
@@ -0,0 +1,116 @@
+import base64
+import mimetypes
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from skyhawk.metricas import medido
+
+INTERVALO_VERIFICACAO_S = 5.0
+
+
+@dataclass(frozen=True)
+class Ativo:
+    caminho: str
+    mtime: float
+    dados: bytes
+    data_uri: str
+    info_pdf: dict
+
+
+def _decodificar_pdf(caminho):
+    """Decodifica a imagem no formato interno do FPDF (a parte cara de ``pdf.image``).
+
+    Usa os parsers privados do FPDF 1.7.2 (versão fixada no requirements.txt);
+    sem eles, devolve None e ``inserir_imagem`` cai no ``pdf.image`` comum.
+    """
+    from fpdf import FPDF
+    extensao = os.path.splitext(caminho)[1].lower()
+    metodo = {'.jpg': '_parsejpg', '.jpeg': '_parsejpg', '.png': '_parsepng'}.get(extensao)
+    parser = getattr(FPDF(), metodo, None) if metodo else None
+    if parser is None:
+        return None
+    try:
+        return parser(caminho)
+    except Exception:
+        return None
+
+
+class RegistroAtivos:
+    """Imagens estáticas carregadas uma vez por processo.
+
+    Guarda os bytes, o data URI em base64 e a imagem já decodificada para o
+    FPDF. O mtime do arquivo é consultado no máximo a cada ``intervalo``
+    segundos; o ativo só é relido quando o arquivo muda.
+    """
+
+    def __init__(self, intervalo=INTERVALO_VERIFICACAO_S):
+        self.intervalo = intervalo
+        self._ativos = {}
+        self._verificado_em = {}
+        self._lock = threading.Lock()
+
+    def obter(self, caminho):
+        agora = time.monotonic()
+        if agora - self._verificado_em.get(caminho, float('-inf')) < self.intervalo:
+            return self._ativos.get(caminho)
+
+        with self._lock:
+            atual = self._ativos.get(caminho)
+            try:
+                mtime = os.stat(caminho).st_mtime
+            except OSError:
+                atual = None
+            else:
+                if atual is None or atual.mtime != mtime:
+                    atual = self._carregar(caminho, mtime)
+            self._ativos[caminho] = atual
+            self._verificado_em[caminho] = agora
+            return atual
+
+    @medido(nome="ativos.carregar")
+    def _carregar(self, caminho, mtime):
+        try:
+            with open(caminho, "rb") as arquivo:
+                dados = arquivo.read()
+        except OSError:
+            return None
+        tipo = mimetypes.guess_type(caminho)[0] or "application/octet-stream"
+        data_uri = f"data:{tipo};base64,{base64.b64encode(dados).decode()}"
+        return Ativo(caminho, mtime, dados, data_uri, _decodificar_pdf(caminho))
+
+
+registro_ativos = RegistroAtivos()
+
+
+def obter_ativo(caminho):
+    return registro_ativos.obter(caminho)
+
+
+def get_image_base64(path):
+    ativo = obter_ativo(path)
+    return ativo.data_uri if ativo else ""
+
+
+def inserir_imagem(pdf, caminho, x=None, y=None, w=0, h=0):
+    """``pdf.image`` usando a imagem já decodificada do registro. Retorna False se ela não existir."""
+    ativo = obter_ativo(caminho)
+    if ativo is None:
+        return False
+    if ativo.info_pdf is None:
+        # Sem a decodificação prévia: o FPDF lê e decodifica o arquivo por conta própria
+        try:
+            pdf.image(caminho, x=x, y=y, w=w, h=h)
+        except Exception:
+            return False
+        return True
+    if caminho not in pdf.images:
+        info = dict(ativo.info_pdf)
+        info['i'] = len(pdf.images) + 1
+        pdf.images[caminho] = info
+        if 'smask' in info and pdf.pdf_version < '1.4':
+            # Mesmo ajuste que o _parsepng faz para PNG com canal alfa
+            pdf.pdf_version = '1.4'
+    pdf.image(caminho, x=x, y=y, w=w, h=h)
+    return True
@@ -0,0 +1,763 @@
+import concurrent.futures
+import contextlib
+import datetime
+import queue
+import sqlite3
+import threading
+
+from skyhawk.carrinho import servico_item, tipo_servico
+from skyhawk.metricas import medido
+
+ARQUIVO_DB = "skyhawk_v33.db"
+TIMEOUT_OCUPADO_S = 30.0
+TAMANHO_POOL_LEITURA = 4
+TOLERANCIA_RESUMO = 0.005
+TAMANHO_LOTE_MIGRACAO = 5000
+MAX_GRUPO_ESCRITA = 64
+TAMANHO_PAGINA = 50
+MIN_BUSCA_TRIGRAMA = 3  # o índice trigram só atende buscas com pelo menos 3 caracteres
+
+SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS propostas (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        cliente TEXT,
+        tipo_contrato TEXT,
+        duracao_meses INTEGER,
+        resumo_servicos TEXT,
+        valor_total REAL,
+        fat_amazing REAL,
+        fat_skyhawk REAL,
+        empresa_destino TEXT,
+        data_registro TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS resumo_propostas (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        qtd_propostas INTEGER NOT NULL DEFAULT 0,
+        total_geral REAL NOT NULL DEFAULT 0,
+        total_skyhawk REAL NOT NULL DEFAULT 0,
+        total_amazing REAL NOT NULL DEFAULT 0
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS resumo_empresas (
+        empresa_destino TEXT PRIMARY KEY,
+        qtd_propostas INTEGER NOT NULL DEFAULT 0
+    )
+    """,
+    "INSERT OR IGNORE INTO resumo_propostas (id) VALUES (1)",
+)
+
+
+# =============================================================================
+# CONEXÕES
+# =============================================================================
+class BancoDados:
+    """Conexões de longa duração para um arquivo SQLite.
+
+    Uma única conexão de escrita por processo, protegida por lock, e um pequeno
+    pool de conexões de leitura. O WAL deixa as leituras seguirem em paralelo
+    com a escrita em andamento. Gravações pequenas e concorrentes passam por
+    ``escrever``: uma thread escritora junta os pedidos pendentes em um único
+    commit (group commit).
+    """
+
+    def __init__(self, caminho=ARQUIVO_DB, tamanho_pool=TAMANHO_POOL_LEITURA):
+        self.caminho = caminho
+        self._lock_escrita = threading.Lock()
+        self._lock_schema = threading.Lock()
+        self._schema_pronto = False
+        self.busca_cliente = False
+        self._tipos_contrato = None
+        self._versao_escrita = 0
+        self._escritor = None
+        self._leitores = queue.LifoQueue()
+        self._vagas_leitura = threading.BoundedSemaphore(tamanho_pool)
+        self._fila_escrita = queue.Queue()
+        self._thread_escrita = None
+        self._lock_thread = threading.Lock()
+
+    @medido(nome="banco.conectar")
+    def _conectar(self):
+        conn = sqlite3.connect(
+            self.caminho, timeout=TIMEOUT_OCUPADO_S, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA busy_timeout={int(TIMEOUT_OCUPADO_S * 1000)}")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def init_schema(self):
+        if self._schema_pronto:
+            return
+        with self._lock_schema:
+            if self._schema_pronto:
+                return
+            with self.transacao() as conn:
+                for comando in SCHEMA:
+                    conn.execute(comando)
+                _aplicar_migracoes(conn)
+                verificar_resumo(conn)
+                self.busca_cliente = conn.execute(
+                    "SELECT 1 FROM sqlite_master WHERE name = 'propostas_busca'").fetchone() is not None
+            self._schema_pronto = True
+
+    @contextlib.contextmanager
+    def transacao(self):
+        """Caminho único de escrita: serializa os writers do processo e faz commit ao final."""
+        with self._lock_escrita:
+            if self._escritor is None:
+                self._escritor = self._conectar()
+            conn = self._escritor
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            self._versao_escrita += 1
+
+    def escrever(self, operacao):
+        """Executa ``operacao(conn)`` na fila de escrita e devolve o seu resultado.
+
+        Os pedidos que chegam juntos são gravados na mesma transação, cada um
+        em um SAVEPOINT: o erro de um pedido desfaz só ele e é relançado para
+        quem o enviou. O resultado só é entregue depois do COMMIT.
+        """
+        with self._lock_thread:
+            if self._thread_escrita is None:
+                self._thread_escrita = threading.Thread(target=self._laco_escrita, name="skyhawk-escrita",
+                                                        daemon=True)
+                self._thread_escrita.start()
+        futuro = concurrent.futures.Future()
+        self._fila_escrita.put((operacao, futuro))
+        return futuro.result()
+
+    def _laco_escrita(self):
+        while True:
+            pedidos = [self._fila_escrita.get()]
+            while len(pedidos) < MAX_GRUPO_ESCRITA and pedidos[-1] is not None:
+                try:
+                    pedidos.append(self._fila_escrita.get_nowait())
+                except queue.Empty:
+                    break
+            parar = pedidos[-1] is None
+            pedidos = [pedido for pedido in pedidos if pedido is not None]
+            if pedidos:
+                self._gravar_grupo(pedidos)
+            if parar:
+                return
+
+    def _gravar_grupo(self, pedidos):
+        concluidos = []
+        try:
+            with self.transacao() as conn:
+                for operacao, futuro in pedidos:
+                    conn.execute("SAVEPOINT pedido")
+                    try:
+                        resultado = operacao(conn)
+                    except Exception as erro:
+                        conn.execute("ROLLBACK TO pedido")
+                        futuro.set_exception(erro)
+                    else:
+                        concluidos.append((futuro, resultado))
+                    finally:
+                        conn.execute("RELEASE pedido")
+        except Exception as erro:
+            for _, futuro in pedidos:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        for futuro, resultado in concluidos:
+            futuro.set_result(resultado)
+
+    @contextlib.contextmanager
+    def leitura(self):
+        with self._vagas_leitura:
+            try:
+                conn = self._leitores.get_nowait()
+            except queue.Empty:
+                conn = self._conectar()
+            try:
+                yield conn
+            finally:
+                self._leitores.put(conn)
+
+    def fechar(self):
+        with self._lock_thread:
+            if self._thread_escrita is not None:
+                self._fila_escrita.put(None)
+                self._thread_escrita.join()
+                self._thread_escrita = None
+        with self._lock_escrita:
+            if self._escritor is not None:
+                self._escritor.close()
+                self._escritor = None
+        while True:
+            try:
+                self._leitores.get_nowait().close()
+            except queue.Empty:
+                break
+        self._schema_pronto = False
+        self._tipos_contrato = None
+
+
+_bancos = {}
+_lock_bancos = threading.Lock()
+_arquivo_padrao = ARQUIVO_DB
+
+
+def obter_banco(caminho=None):
+    """Instância compartilhada por processo para o arquivo informado (padrão: ver usar_arquivo)."""
+    caminho = caminho or _arquivo_padrao
+    banco = _bancos.get(caminho)
+    if banco is None:
+        with _lock_bancos:
+            banco = _bancos.setdefault(caminho, BancoDados(caminho))
+    return banco
+
+
+@contextlib.contextmanager
+def usar_arquivo(caminho):
+    """Aponta as funções deste módulo para outro arquivo durante o bloco, no processo inteiro.
+
+    Ao sair, volta o arquivo anterior; a instância de ``caminho`` é fechada e
+    descartada se foi criada aqui (ex.: banco temporário do benchmark).
+    """
+    global _arquivo_padrao
+    nova = caminho not in _bancos
+    anterior, _arquivo_padrao = _arquivo_padrao, caminho
+    try:
+        yield obter_banco(caminho)
+    finally:
+        _arquivo_padrao = anterior
+        if nova:
+            with _lock_bancos:
+                banco = _bancos.pop(caminho, None)
+            if banco is not None:
+                banco.fechar()
+
+
+def _banco():
+    banco = obter_banco()
+    banco.init_schema()
+    return banco
+
+
+# =============================================================================
+# PROPOSTAS
+# =============================================================================
+def init_db():
+    _banco()
+
+
+SQL_INSERIR_ITEM = """
+    INSERT INTO proposta_itens (proposta_id, servico, nome, qtd, unidade, valor_unit, valor_total)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+
+@medido
+def salvar_venda(cliente, contrato, duracao, servicos, total, fat_amz, fat_sky, empresa, itens=(),
+                 chave_idempotencia=None):
+    """Grava uma venda pela fila de escrita e devolve o id da proposta.
+
+    Com ``chave_idempotencia`` (gerada pelo carrinho), repetir a chamada
+    devolve a proposta já gravada em vez de inserir outra.
+    """
+    agora = datetime.datetime.now()
+    data_hoje = agora.strftime("%d/%m/%Y")
+    itens = list(itens)
+
+    def gravar(conn):
+        if chave_idempotencia is not None:
+            existente = conn.execute("SELECT id FROM propostas WHERE chave_idempotencia = ?",
+                                     (chave_idempotencia,)).fetchone()
+            if existente:
+                return existente[0]
+        proposta_id = conn.execute("""
+            INSERT INTO propostas (cliente, tipo_contrato, duracao_meses, resumo_servicos, valor_total, fat_amazing, fat_skyhawk, empresa_destino, data_registro, registrado_em, chave_idempotencia)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (cliente, contrato, duracao, servicos, total, fat_amz, fat_sky, empresa, data_hoje,
+              agora.isoformat(timespec='seconds'), chave_idempotencia)).lastrowid
+        conn.executemany(SQL_INSERIR_ITEM, [
+            (proposta_id, servico_item(item), item['nome'], item['qtd'],
+             item['unidade'], item['valor_unit'], item['valor_total'])
+            for item in itens
+        ])
+        _acumular_resumo(conn, 1, total, fat_sky, fat_amz, {empresa: 1})
+        return proposta_id
+
+    banco = _banco()
+    proposta_id = banco.escrever(gravar)
+    _tipos_gravados(banco, [contrato])
+    return proposta_id
+
+
+@medido
+def salvar_vendas_lote(vendas):
+    """Grava várias vendas em uma única transação, com ``executemany``.
+
+    Cada venda é um dict com as chaves de salvar_venda (cliente, contrato,
+    duracao, servicos, total, fat_amz, fat_sky, empresa, itens) mais
+    ``registrado_em`` (datetime). Os ids são reservados a partir da sequência
+    da tabela, já com o lock de escrita, para ligar os itens sem um INSERT por
+    proposta. Retorna a quantidade gravada.
+    """
+    if not vendas:
+        return 0
+    banco = _banco()
+    with banco.transacao() as conn:
+        ultimo_id = conn.execute("""
+            SELECT MAX(IFNULL((SELECT seq FROM sqlite_sequence WHERE name = 'propostas'), 0),
+                       (SELECT IFNULL(MAX(id), 0) FROM propostas))
+        """).fetchone()[0]
+        propostas, itens = [], []
+        por_empresa = {}
+        for proposta_id, venda in enumerate(vendas, ultimo_id + 1):
+            registrado_em = venda['registrado_em']
+            propostas.append((proposta_id, venda['cliente'], venda['contrato'], venda['duracao'], venda['servicos'],
+                              venda['total'], venda['fat_amz'], venda['fat_sky'], venda['empresa'],
+                              registrado_em.strftime("%d/%m/%Y"), registrado_em.isoformat(timespec='seconds')))
+            itens.extend(
+                (proposta_id, servico_item(item), item['nome'], item['qtd'],
+                 item['unidade'], item['valor_unit'], item['valor_total'])
+                for item in venda['itens']
+            )
+            por_empresa[venda['empresa']] = por_empresa.get(venda['empresa'], 0) + 1
+        if banco.busca_cliente:
+            # O gatilho indexa linha a linha (~70 µs por venda); um INSERT ... SELECT no fim do lote, ~3 µs
+            conn.execute("DROP TRIGGER propostas_busca_insert")
+        conn.executemany("""
+            INSERT INTO propostas (id, cliente, tipo_contrato, duracao_meses, resumo_servicos, valor_total, fat_amazing, fat_skyhawk, empresa_destino, data_registro, registrado_em)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, propostas)
+        conn.executemany(SQL_INSERIR_ITEM, itens)
+        if banco.busca_cliente:
+            conn.execute("INSERT INTO propostas_busca (rowid, cliente) SELECT id, cliente FROM propostas WHERE id > ?",
+                         (ultimo_id,))
+            conn.execute(SQL_GATILHO_BUSCA_INSERIR)
+        _acumular_resumo(conn, len(vendas), sum(venda['total'] for venda in vendas),
+                         sum(venda['fat_sky'] for venda in vendas), sum(venda['fat_amz'] for venda in vendas),
+                         por_empresa)
+    _tipos_gravados(banco, {venda['contrato'] for venda in vendas})
+    return len(vendas)
+
+
+def _filtro_periodo(inicio, fim):
+    """Cláusula WHERE sobre registrado_em (ISO-8601) para o intervalo [inicio, fim)."""
+    condicoes, parametros = [], []
+    if inicio is not None:
+        condicoes.append("registrado_em >= ?")
+        parametros.append(str(inicio))
+    if fim is not None:
+        condicoes.append("registrado_em < ?")
+        parametros.append(str(fim))
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), parametros
+
+
+def periodo_mes(ano, mes):
+    """Intervalo [primeiro dia do mês, primeiro dia do mês seguinte)."""
+    inicio = datetime.date(ano, mes, 1)
+    fim = datetime.date(ano + mes // 12, mes % 12 + 1, 1)
+    return inicio, fim
+
+
+@medido
+def carregar_dados(inicio=None, fim=None):
+    import pandas as pd
+    where, parametros = _filtro_periodo(inicio, fim)
+    with _banco().leitura() as conn:
+        return pd.read_sql_query("SELECT * FROM propostas" + where, conn, params=parametros)
+
+
+COLUNAS_NAVEGADOR = ("id", "cliente", "tipo_contrato", "duracao_meses", "resumo_servicos", "valor_total",
+                     "fat_skyhawk", "fat_amazing", "empresa_destino", "data_registro", "registrado_em")
+ORDENACOES = ("registrado_em", "valor_total", "cliente", "id")
+
+
+@medido
+def listar_propostas(cliente=None, tipo_contrato=None, empresa=None, inicio=None, fim=None,
+                     ordenar_por="registrado_em", decrescente=True, apos=None, tamanho_pagina=TAMANHO_PAGINA):
+    """Uma página de contratos, filtrada e ordenada no SQLite (paginação por keyset).
+
+    ``apos`` é o cursor devolvido pela página anterior: o par (valor da
+    coluna de ordenação, id) da última linha. A consulta continua dali pelo
+    índice, sem OFFSET, então o custo por página não cresce com a tabela.
+    Retorna ``(DataFrame, cursor da próxima página ou None)``. Linhas com a
+    coluna de ordenação nula vêm no fim (decrescente) ou no começo (crescente),
+    por id, como o SQLite as guarda no índice.
+    """
+    import pandas as pd
+    if ordenar_por not in ORDENACOES:
+        raise ValueError(f"Ordenação inválida: {ordenar_por}")
+    banco = _banco()
+    where, parametros = _filtro_periodo(inicio, fim)
+    condicoes = [where[len(" WHERE "):]] if where else []
+    if cliente:
+        if len(cliente) >= MIN_BUSCA_TRIGRAMA and banco.busca_cliente:
+            # Candidatos pelo índice FTS5 trigram; o LIKE abaixo mantém a semântica exata
+            condicoes.append("id IN (SELECT rowid FROM propostas_busca WHERE propostas_busca MATCH ?)")
+            parametros.append('"' + cliente.replace('"', '""') + '"')
+        condicoes.append("cliente LIKE ? ESCAPE '\\'")
+        parametros.append("%" + cliente.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+    if tipo_contrato:
+        condicoes.append("tipo_contrato = ?")
+        parametros.append(tipo_contrato)
+    if empresa:
+        condicoes.append("empresa_destino = ?")
+        parametros.append(empresa)
+    sentido, comparacao = ("DESC", "<") if decrescente else ("ASC", ">")
+    # (coluna, id) < (?, ?) nunca é verdadeiro para coluna nula: as linhas nulas são um trecho à
+    # parte do índice, depois das demais em ordem decrescente e antes delas em ordem crescente.
+    trechos = [(False, f"{ordenar_por} IS NOT NULL", f"({ordenar_por}, id) {comparacao} (?, ?)")]
+    if ordenar_por != "id":
+        nulos = (True, f"{ordenar_por} IS NULL", f"id {comparacao} ?")
+        trechos = trechos + [nulos] if decrescente else [nulos] + trechos
+    if apos is not None:
+        primeiro = [nulo for nulo, _, _ in trechos].index(apos[0] is None)
+        trechos = trechos[primeiro:]
+
+    linhas = []
+    with banco.leitura() as conn:
+        for numero, (nulo, trecho, cursor) in enumerate(trechos):
+            filtros, valores = condicoes + [trecho], list(parametros)
+            if apos is not None and numero == 0:
+                filtros.append(cursor)
+                valores += [apos[1]] if nulo else list(apos)
+            sql = (f"SELECT {', '.join(COLUNAS_NAVEGADOR)} FROM propostas WHERE {' AND '.join(filtros)}"
+                   f" ORDER BY {ordenar_por} {sentido}, id {sentido} LIMIT ?")
+            linhas += conn.execute(sql, valores + [tamanho_pagina + 1 - len(linhas)]).fetchall()
+            if len(linhas) > tamanho_pagina:
+                break
+    proximo = None
+    if len(linhas) > tamanho_pagina:
+        linhas = linhas[:tamanho_pagina]
+        proximo = (linhas[-1][COLUNAS_NAVEGADOR.index(ordenar_por)], linhas[-1][0])
+    return pd.DataFrame.from_records(linhas, columns=COLUNAS_NAVEGADOR), proximo
+
+
+def _tipos_gravados(banco, tipos):
+    # Propostas só são inseridas: a lista de tipos_contrato só envelhece quando entra um tipo novo
+    atuais = banco._tipos_contrato
+    if atuais is not None and not {tipo for tipo in tipos if tipo is not None} <= set(atuais):
+        banco._tipos_contrato = None
+
+
+@medido
+def tipos_contrato():
+    """Tipos de contrato existentes, guardados até uma gravação trazer um tipo novo."""
+    banco = _banco()
+    tipos, versao = banco._tipos_contrato, banco._versao_escrita
+    if tipos is None:
+        with banco.leitura() as conn:
+            tipos = [tipo for (tipo,) in conn.execute(
+                "SELECT DISTINCT tipo_contrato FROM propostas WHERE tipo_contrato IS NOT NULL ORDER BY 1")]
+        if banco._versao_escrita == versao:
+            banco._tipos_contrato = tipos
+    return list(tipos)
+
+
+@contextlib.contextmanager
+def instantaneo():
+    """Conexão de leitura com uma visão consistente do banco (transação de leitura do WAL)."""
+    with _banco().leitura() as conn:
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+
+def iterar_lotes(conn, sql, parametros=(), tamanho_lote=5000):
+    """Percorre o resultado da consulta pelo cursor, entregando um DataFrame por lote."""
+    import pandas as pd
+    cursor = conn.execute(sql, parametros)
+    colunas = [c[0] for c in cursor.description]
+    while True:
+        linhas = cursor.fetchmany(tamanho_lote)
+        if not linhas:
+            break
+        yield pd.DataFrame.from_records(linhas, columns=colunas)
+
+
+@medido
+def faturamento_por_servico(inicio=None, fim=None):
+    """Receita e volume por tipo de serviço, agregados no SQLite."""
+    import pandas as pd
+    where, parametros = _filtro_periodo(inicio, fim)
+    filtro = f" WHERE proposta_id IN (SELECT id FROM propostas{where})" if where else ""
+    with _banco().leitura() as conn:
+        return pd.read_sql_query(f"""
+            SELECT servico,
+                   COUNT(DISTINCT proposta_id) AS contratos,
+                   COUNT(*) AS itens,
+                   SUM(qtd) AS qtd_total,
+                   AVG(qtd) AS qtd_media,
+                   TOTAL(valor_total) AS receita_mensal
+            FROM proposta_itens{filtro}
+            GROUP BY servico
+            ORDER BY receita_mensal DESC
+        """, conn, params=parametros)
+
+
+@medido
+def contratos_por_mes_inicio():
+    """Receita mensal contratada agrupada por (mês de início, vigência), base da série recorrente."""
+    import pandas as pd
+    with _banco().leitura() as conn:
+        return pd.read_sql_query("""
+            SELECT substr(registrado_em, 1, 7) AS mes_inicio, IFNULL(duracao_meses, 0) AS duracao_meses,
+                   TOTAL(fat_skyhawk) AS fat_skyhawk, TOTAL(fat_amazing) AS fat_amazing
+            FROM propostas
+            WHERE registrado_em IS NOT NULL
+            GROUP BY 1, 2
+        """, conn)
+
+
+# =============================================================================
+# RESUMO (ROLLUP) DO DASHBOARD
+# =============================================================================
+def _acumular_resumo(conn, qtd, total, fat_sky, fat_amz, por_empresa):
+    """Soma um lote de vendas ao resumo, dentro da transação de quem gravou."""
+    conn.execute("""
+        UPDATE resumo_propostas
+        SET qtd_propostas = qtd_propostas + ?, total_geral = total_geral + ?,
+            total_skyhawk = total_skyhawk + ?, total_amazing = total_amazing + ?
+        WHERE id = 1
+    """, (qtd, total, fat_sky, fat_amz))
+    conn.executemany("""
+        INSERT INTO resumo_empresas (empresa_destino, qtd_propostas) VALUES (?, ?)
+        ON CONFLICT (empresa_destino) DO UPDATE SET qtd_propostas = qtd_propostas + excluded.qtd_propostas
+    """, por_empresa.items())
+
+
+def _reconstruir_resumo(conn):
+    conn.execute("""
+        UPDATE resumo_propostas
+        SET (qtd_propostas, total_geral, total_skyhawk, total_amazing) = (
+            SELECT COUNT(*), TOTAL(valor_total), TOTAL(fat_skyhawk), TOTAL(fat_amazing) FROM propostas
+        )
+        WHERE id = 1
+    """)
+    conn.execute("DELETE FROM resumo_empresas")
+    conn.execute("""
+        INSERT INTO resumo_empresas (empresa_destino, qtd_propostas)
+        SELECT empresa_destino, COUNT(*) FROM propostas GROUP BY empresa_destino
+    """)
+
+
+@medido
+def verificar_resumo(conn=None):
+    """Confere o resumo contra a tabela propostas e o reconstrói se houver divergência.
+
+    Retorna True quando foi preciso reconstruir.
+    """
+    if conn is None:
+        with _banco().transacao() as conn:
+            return verificar_resumo(conn)
+
+    atual = conn.execute("""
+        SELECT qtd_propostas, total_geral, total_skyhawk, total_amazing FROM resumo_propostas WHERE id = 1
+    """).fetchone()
+    real = conn.execute("""
+        SELECT COUNT(*), TOTAL(valor_total), TOTAL(fat_skyhawk), TOTAL(fat_amazing) FROM propostas
+    """).fetchone()
+    empresas_atual = dict(conn.execute("SELECT empresa_destino, qtd_propostas FROM resumo_empresas WHERE qtd_propostas > 0"))
+    empresas_real = dict(conn.execute("SELECT empresa_destino, COUNT(*) FROM propostas GROUP BY empresa_destino"))
+
+    divergente = (
+        atual[0] != real[0]
+        or any(abs(a - r) > TOLERANCIA_RESUMO for a, r in zip(atual[1:], real[1:]))
+        or empresas_atual != empresas_real
+    )
+    if divergente:
+        _reconstruir_resumo(conn)
+    return divergente
+
+
+@medido
+def carregar_resumo(conn=None):
+    """Totais do dashboard lidos do resumo, sem varrer a tabela propostas."""
+    if conn is None:
+        with _banco().leitura() as conn:
+            return carregar_resumo(conn)
+
+    qtd, total_geral, total_sky, total_amz = conn.execute("""
+        SELECT qtd_propostas, total_geral, total_skyhawk, total_amazing FROM resumo_propostas WHERE id = 1
+    """).fetchone()
+    por_empresa = dict(conn.execute("""
+        SELECT empresa_destino, qtd_propostas FROM resumo_empresas WHERE qtd_propostas > 0 ORDER BY empresa_destino
+    """))
+    return {
+        'qtd_propostas': qtd,
+        'total_geral': total_geral,
+        'total_skyhawk': total_sky,
+        'total_amazing': total_amz,
+        'por_empresa': por_empresa,
+    }
+
+
+@medido
+def carregar_resumo_periodo(inicio, fim):
+    """Mesmos totais de carregar_resumo, restritos a um intervalo de datas (consulta indexada)."""
+    where, parametros = _filtro_periodo(inicio, fim)
+    with _banco().leitura() as conn:
+        qtd, total_geral, total_sky, total_amz = conn.execute(f"""
+            SELECT COUNT(*), TOTAL(valor_total), TOTAL(fat_skyhawk), TOTAL(fat_amazing) FROM propostas{where}
+        """, parametros).fetchone()
+        por_empresa = dict(conn.execute(f"""
+            SELECT empresa_destino, COUNT(*) FROM propostas{where} GROUP BY empresa_destino ORDER BY empresa_destino
+        """, parametros))
+    return {
+        'qtd_propostas': qtd,
+        'total_geral': total_geral,
+        'total_skyhawk': total_sky,
+        'total_amazing': total_amz,
+        'por_empresa': por_empresa,
+    }
+
+
+# =============================================================================
+# MIGRAÇÕES (PRAGMA user_version)
+# =============================================================================
+def _migracao_itens(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS proposta_itens (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            proposta_id INTEGER NOT NULL REFERENCES propostas (id),
+            servico TEXT NOT NULL,
+            nome TEXT,
+            qtd INTEGER,
+            unidade TEXT,
+            valor_unit REAL,
+            valor_total REAL
+        )
+    """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_itens_proposta ON proposta_itens (proposta_id)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_itens_servico ON proposta_itens (servico, proposta_id, valor_total)")
+
+    # Backfill: propostas antigas só guardam os nomes em resumo_servicos. A receita de
+    # cada empresa é dividida igualmente entre os seus itens; qtd e unidade ficam nulas.
+    cursor = conn.execute("""
+        SELECT id, resumo_servicos, fat_skyhawk, fat_amazing FROM propostas
+        WHERE resumo_servicos IS NOT NULL AND resumo_servicos != ''
+          AND id NOT IN (SELECT proposta_id FROM proposta_itens)
+    """)
+    while True:
+        linhas = cursor.fetchmany(TAMANHO_LOTE_MIGRACAO)
+        if not linhas:
+            break
+        conn.executemany(SQL_INSERIR_ITEM, [
+            item for linha in linhas for item in itens_de_resumo(*linha)
+        ])
+
+
+def itens_de_resumo(proposta_id, resumo_servicos, fat_sky, fat_amz):
+    """Reconstrói os itens de uma proposta a partir do resumo "nome, nome, ..."."""
+    nomes = [nome.strip() for nome in resumo_servicos.split(",") if nome.strip()]
+    servicos = [tipo_servico(nome) for nome in nomes]
+    n_sky = sum(1 for servico in servicos if servico == "Monitoramento")
+    n_amz = len(nomes) - n_sky
+    itens = []
+    for nome, servico in zip(nomes, servicos):
+        if servico == "Monitoramento":
+            valor = (fat_sky or 0.0) / n_sky
+        else:
+            valor = (fat_amz or 0.0) / n_amz
+        itens.append((proposta_id, servico, nome, None, None, None, valor))
+    return itens
+
+
+def _migracao_registrado_em(conn):
+    conn.execute("ALTER TABLE propostas ADD COLUMN registrado_em TEXT")
+    # data_registro antigo: "dd/mm/aaaa" -> "aaaa-mm-ddT00:00:00"
+    conn.execute("""
+        UPDATE propostas
+        SET registrado_em = substr(data_registro, 7, 4) || '-' || substr(data_registro, 4, 2) || '-'
+                            || substr(data_registro, 1, 2) || 'T00:00:00'
+        WHERE data_registro GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS idx_propostas_registrado_em
+        ON propostas (registrado_em, valor_total, fat_skyhawk, fat_amazing)
+    """)
+
+
+def _migracao_chave_idempotencia(conn):
+    conn.execute("ALTER TABLE propostas ADD COLUMN chave_idempotencia TEXT")
+    # NULL (vendas antigas e importadas) não conflita no índice UNIQUE
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_propostas_chave_idempotencia ON propostas (chave_idempotencia)
+    """)
+
+
+def _migracao_indices_navegador(conn):
+    # Um índice por ordenação do navegador. Cada um termina implicitamente no rowid (id) e serve
+    # ao ORDER BY coluna, id do keyset; tipo e empresa são conferidos ao percorrer o índice.
+    for comando in (
+        "CREATE INDEX IF NOT EXISTS idx_propostas_registro ON propostas (registrado_em)",
+        "CREATE INDEX IF NOT EXISTS idx_propostas_valor ON propostas (valor_total)",
+        "CREATE INDEX IF NOT EXISTS idx_propostas_cliente ON propostas (cliente)",
+    ):
+        conn.execute(comando)
+
+
+SQL_GATILHO_BUSCA_INSERIR = """
+    CREATE TRIGGER propostas_busca_insert AFTER INSERT ON propostas BEGIN
+        INSERT INTO propostas_busca (rowid, cliente) VALUES (new.id, new.cliente);
+    END
+"""
+
+
+def _migracao_busca_cliente(conn):
+    # Busca "cliente contém" pelo índice FTS5 trigram (conteúdo externo: o texto fica só em propostas).
+    # Sem FTS5/trigram no SQLite (< 3.34), a busca segue pelo LIKE, varrendo a tabela.
+    # Custo na escrita: o gatilho soma ~70 µs a cada venda de salvar_venda; salvar_vendas_lote
+    # desliga o gatilho e indexa o lote inteiro de uma vez (~3 µs por venda).
+    try:
+        conn.execute("""
+            CREATE VIRTUAL TABLE propostas_busca
+            USING fts5(cliente, content='propostas', content_rowid='id', tokenize='trigram')
+        """)
+    except sqlite3.OperationalError:
+        return
+    for comando in (
+        SQL_GATILHO_BUSCA_INSERIR,
+        """CREATE TRIGGER propostas_busca_delete AFTER DELETE ON propostas BEGIN
+               INSERT INTO propostas_busca (propostas_busca, rowid, cliente) VALUES ('delete', old.id, old.cliente);
+           END""",
+        """CREATE TRIGGER propostas_busca_update AFTER UPDATE OF cliente ON propostas BEGIN
+               INSERT INTO propostas_busca (propostas_busca, rowid, cliente) VALUES ('delete', old.id, old.cliente);
+               INSERT INTO propostas_busca (rowid, cliente) VALUES (new.id, new.cliente);
+           END""",
+        "INSERT INTO propostas_busca (propostas_busca) VALUES ('rebuild')",
+    ):
+        conn.execute(comando)
+
+
+def _migracao_remover_indices_filtro(conn):
+    # (tipo_contrato, registrado_em) e (empresa_destino, registrado_em) levavam o planejador a
+    # filtrar por eles e ordenar dezenas de milhares de linhas quando a ordenação era outra.
+    conn.execute("DROP INDEX IF EXISTS idx_propostas_tipo")
+    conn.execute("DROP INDEX IF EXISTS idx_propostas_empresa")
+
+
+MIGRACOES = (
+    _migracao_itens,
+    _migracao_registrado_em,
+    _migracao_chave_idempotencia,
+    _migracao_indices_navegador,
+    _migracao_busca_cliente,
+    _migracao_remover_indices_filtro,
+)
+
+
+def _aplicar_migracoes(conn):
+    versao = conn.execute("PRAGMA user_version").fetchone()[0]
+    for numero, migracao in enumerate(MIGRACOES[versao:], start=versao + 1):
+        migracao(conn)
+        conn.execute(f"PRAGMA user_version = {numero}")
@@ -0,0 +1,238 @@
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from skyhawk import banco
+from skyhawk.carrinho import calcular_totais
+from skyhawk.precos import carregar_catalogo, cotar
+from skyhawk.propostas import gerar_proposta_html, gerar_proposta_pdf
+from skyhawk.relatorios import gerar_relatorio_geral_completo_pdf
+from skyhawk.roi import gerar_analise_roi
+
+TAMANHOS_BANCO = (1000, 100000, 1000000)
+TAMANHOS_CARRINHO = (1, 10, 100, 500)
+REPETICOES = 5
+ORCAMENTO_S = 5.0  # tempo máximo de repetições extras por operação (a primeira sempre roda)
+TOLERANCIA = 0.20
+DIFERENCA_MINIMA_S = 0.001  # pioras menores que isso são ruído de medição, não regressão
+LOTE_INSERCAO = 20000
+SEMENTE = 33
+VERSAO_RESULTADOS = 1
+
+CONTRATOS = ("Comodato (Aluguel)", "Venda + Software (SaaS)")
+DURACOES = (12, 24, 36, 48, 60)
+ITENS_SINTETICOS = (
+    ("Monitoramento 24h", "Monitoramento", "ronda", 2500.0),
+    ("Volumetria (4 Bat)", "Volumetria", "volume", 1600.0),
+    ("Inspeções", "Inspeções", "inspeção", 1500.0),
+    ("Mapeamento", "Mapeamento", "hectare", 90.0),
+)
+
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+def medir(funcao, repeticoes=REPETICOES, memoria=True):
+    """Tempo (mínimo e mediana de até ``repeticoes`` execuções) e pico de memória de ``funcao()``.
+
+    O pico vem de uma execução extra sob tracemalloc, fora da cronometragem,
+    e conta só as alocações feitas pelo Python e pelo numpy.
+    """
+    tempos = []
+    inicio_total = time.perf_counter()
+    while len(tempos) < repeticoes and (not tempos or time.perf_counter() - inicio_total < ORCAMENTO_S):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    resultado = {"mediana_s": statistics.median(tempos), "min_s": min(tempos), "execucoes": len(tempos)}
+    if memoria:
+        tracemalloc.start()
+        try:
+            funcao()
+            resultado["pico_mb"] = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        finally:
+            tracemalloc.stop()
+    return resultado
+
+
+# =============================================================================
+# DADOS SINTÉTICOS
+# =============================================================================
+def vendas_sinteticas(quantidade, semente=SEMENTE):
+    """Gera ``quantidade`` vendas no formato de salvar_vendas_lote, reprodutíveis pela semente."""
+    rng = random.Random(semente)
+    origem = datetime.datetime(2023, 1, 1)
+    minutos = 3 * 365 * 24 * 60
+    for indice in range(quantidade):
+        itens = []
+        for nome, servico, unidade, preco in rng.sample(ITENS_SINTETICOS, rng.randint(1, 3)):
+            qtd = rng.randint(1, 10)
+            itens.append({"nome": nome, "servico": servico, "qtd": qtd, "unidade": unidade,
+                          "valor_unit": preco, "valor_total": qtd * preco})
+        total, fat_sky, fat_amz, empresa = calcular_totais(itens)
+        yield {"cliente": f"Cliente {indice % 5000:04d}", "contrato": rng.choice(CONTRATOS),
+               "duracao": rng.choice(DURACOES), "servicos": ", ".join(item['nome'] for item in itens),
+               "total": total, "fat_amz": fat_amz, "fat_sky": fat_sky, "empresa": empresa, "itens": itens,
+               "registrado_em": origem + datetime.timedelta(minutes=rng.randrange(minutos))}
+
+
+def popular_banco(quantidade, tamanho_lote=LOTE_INSERCAO):
+    """Insere as vendas sintéticas no banco atual em lotes de ``tamanho_lote``."""
+    vendas = vendas_sinteticas(quantidade)
+    while True:
+        lote = [venda for _, venda in zip(range(tamanho_lote), vendas)]
+        if not lote:
+            break
+        banco.salvar_vendas_lote(lote)
+
+
+def carrinho_sintetico(quantidade, contrato=CONTRATOS[0], duracao=36):
+    """Cotação (ver precos.cotar) com ``quantidade`` itens alternando os serviços do catálogo."""
+    especificacoes = (
+        {"servico": "Monitoramento", "rondas_extras": 2},
+        {"servico": "Volumetria", "volumes": 2, "baterias": 4},
+        {"servico": "Inspeções", "qtd": 3, "valor": 1500.0},
+        {"servico": "Mapeamento", "qtd": 40, "valor": 90.0},
+    )
+    return cotar({"contrato": contrato, "duracao": duracao,
+                  "itens": [especificacoes[i % len(especificacoes)] for i in range(quantidade)]})
+
+
+def banco_temporario(pasta):
+    """Aponta o banco (ver banco.usar_arquivo) para um arquivo novo em ``pasta`` durante o bloco."""
+    return banco.usar_arquivo(os.path.join(pasta, banco.ARQUIVO_DB))
+
+
+# =============================================================================
+# CENÁRIOS
+# =============================================================================
+def _cenario_banco(quantidade, pasta, repeticoes, pular, registrar):
+    with banco_temporario(pasta):
+        banco.init_db()
+        inicio = time.perf_counter()
+        popular_banco(quantidade)
+        duracao = time.perf_counter() - inicio
+        registrar("inserir_lote", {"mediana_s": duracao, "min_s": duracao, "execucoes": 1,
+                                   "linhas_por_s": quantidade / duracao})
+
+        carrinho = carrinho_sintetico(5)
+        contador = iter(range(sys.maxsize))
+
+        def salvar():
+            banco.salvar_venda("Cliente Benchmark", CONTRATOS[0], 36, "Monitoramento", carrinho['total'],
+                               carrinho['fat_amz'], carrinho['fat_sky'], carrinho['empresa'], carrinho['itens'],
+                               chave_idempotencia=f"benchmark-{next(contador)}")
+
+        inicio_mes, fim_mes = banco.periodo_mes(2025, 6)
+        relatorio = os.path.join(pasta, "relatorio.pdf")
+        operacoes = {
+            "salvar_venda": salvar,
+            "carregar_dados": banco.carregar_dados,
+            "carregar_resumo": banco.carregar_resumo,
+            "carregar_resumo_periodo": lambda: banco.carregar_resumo_periodo(inicio_mes, fim_mes),
+            "faturamento_por_servico": banco.faturamento_por_servico,
+            "contratos_por_mes_inicio": banco.contratos_por_mes_inicio,
+            "listar_propostas": banco.listar_propostas,
+            "relatorio_geral_pdf": lambda: gerar_relatorio_geral_completo_pdf(relatorio),
+        }
+        for nome, funcao in operacoes.items():
+            if nome not in pular:
+                registrar(nome, medir(funcao, repeticoes))
+
+
+def _cenario_carrinho(quantidade, repeticoes, pular, registrar):
+    cotacao = carrinho_sintetico(quantidade)
+    itens = cotacao['itens']
+    roi = gerar_analise_roi(CONTRATOS[0], cotacao['total'], 36)
+    argumentos = ("Cliente Benchmark", CONTRATOS[0], 36, itens, cotacao['total'], roi)
+    operacoes = {
+        "cotar": lambda: carrinho_sintetico(quantidade),
+        "calcular_totais": lambda: calcular_totais(itens),
+        "proposta_pdf": lambda: gerar_proposta_pdf(*argumentos),
+        "proposta_html": lambda: gerar_proposta_html(*argumentos),
+    }
+    for nome, funcao in operacoes.items():
+        if nome not in pular:
+            registrar(nome, medir(funcao, repeticoes))
+
+
+def executar(tamanhos_banco=TAMANHOS_BANCO, tamanhos_carrinho=TAMANHOS_CARRINHO, repeticoes=REPETICOES,
+             pular=(), pasta=None, progresso=None):
+    """Roda os cenários e devolve os resultados (ver salvar_resultados).
+
+    Cada tamanho de banco é criado do zero em um diretório temporário (ou em
+    ``pasta``), sem tocar no banco real. ``pular`` lista operações a ignorar
+    (ex.: ``relatorio_geral_pdf`` no banco de 1M). ``progresso(chave, medida)``
+    é chamado a cada operação medida.
+    """
+    carregar_catalogo()
+    resultados = {}
+
+    def registrador(prefixo):
+        def registrar(nome, medida):
+            resultados[f"{prefixo}/{nome}"] = medida
+            if progresso:
+                progresso(f"{prefixo}/{nome}", medida)
+        return registrar
+
+    for quantidade in tamanhos_carrinho:
+        _cenario_carrinho(quantidade, repeticoes, pular, registrador(f"carrinho_{quantidade}"))
+    for quantidade in tamanhos_banco:
+        with tempfile.TemporaryDirectory(prefix=f"skyhawk-bench-{quantidade}-", dir=pasta) as temporaria:
+            _cenario_banco(quantidade, temporaria, repeticoes, pular, registrador(f"banco_{quantidade}"))
+
+    return {
+        "versao": VERSAO_RESULTADOS,
+        "gerado_em": datetime.datetime.now().isoformat(timespec='seconds'),
+        "ambiente": {"python": platform.python_version(), "sqlite": sqlite3.sqlite_version,
+                     "plataforma": platform.platform(), "processador": platform.processor() or platform.machine()},
+        "repeticoes": repeticoes,
+        "resultados": resultados,
+    }
+
+
+# =============================================================================
+# RESULTADOS E LINHA DE BASE
+# =============================================================================
+def salvar_resultados(resultados, caminho):
+    with open(caminho, 'w', encoding='utf-8') as arquivo:
+        json.dump(resultados, arquivo, indent=2, ensure_ascii=False)
+
+
+def carregar_resultados(caminho):
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def comparar(atual, base, tolerancia=TOLERANCIA, diferenca_minima=DIFERENCA_MINIMA_S):
+    """Compara duas execuções operação a operação pela mediana (e pelo pico de memória).
+
+    Retorna uma lista de dicts ``{chave, base_s, atual_s, razao, pico_base_mb,
+    pico_atual_mb, regressao}``; ``regressao`` é True quando o tempo ou a
+    memória piora mais que ``tolerancia`` (fração); no tempo, a piora também
+    precisa passar de ``diferenca_minima`` segundos. Operações presentes em só
+    um dos lados ficam de fora.
+    """
+    comparacao = []
+    for chave, medida in atual['resultados'].items():
+        anterior = base['resultados'].get(chave)
+        if anterior is None:
+            continue
+        razao = medida['mediana_s'] / anterior['mediana_s'] if anterior['mediana_s'] else float('inf')
+        pico_base, pico_atual = anterior.get('pico_mb'), medida.get('pico_mb')
+        piora_tempo = razao > 1 + tolerancia and medida['mediana_s'] - anterior['mediana_s'] > diferenca_minima
+        piora_memoria = bool(pico_base and pico_atual and pico_atual > pico_base * (1 + tolerancia))
+        comparacao.append({
+            "chave": chave, "base_s": anterior['mediana_s'], "atual_s": medida['mediana_s'], "razao": razao,
+            "pico_base_mb": pico_base, "pico_atual_mb": pico_atual,
+            "regressao": piora_tempo or piora_memoria,
+        })
+    return comparacao
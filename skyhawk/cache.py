@@ -0,0 +1,181 @@
+import collections
+import collections.abc
+import contextlib
+import dataclasses
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+from skyhawk.ativos import obter_ativo
+from skyhawk.config import ARQUIVO_LOGO, LIMITE_CACHE_DISCO_MB, LIMITE_CACHE_MB, PASTA_CACHE
+
+
+class CacheArtefatos:
+    """Cache LRU de documentos gerados, endereçado pelo hash das entradas.
+
+    O limite é em bytes. Com ``pasta`` definida, cada artefato também é gravado
+    em disco e sobrevive a reinícios do processo; o disco tem limite próprio
+    (``limite_disco_bytes``) e descarta os arquivos usados há mais tempo
+    (pelo mtime, renovado a cada leitura).
+    """
+
+    def __init__(self, limite_bytes=LIMITE_CACHE_MB * 1024 * 1024, pasta=None,
+                 limite_disco_bytes=LIMITE_CACHE_DISCO_MB * 1024 * 1024):
+        self.limite_bytes = limite_bytes
+        self.pasta = pasta
+        self.limite_disco_bytes = limite_disco_bytes
+        self._itens = collections.OrderedDict()
+        self._ocupado = 0
+        self._disco = collections.OrderedDict()
+        self._ocupado_disco = 0
+        self._lock = threading.Lock()
+        if pasta:
+            os.makedirs(pasta, exist_ok=True)
+            self._indexar_disco()
+
+    def obter(self, chave, gerar):
+        """Devolve o artefato da chave, chamando ``gerar()`` só quando ele não existe."""
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave][0]
+
+        valor = self._ler_disco(chave)
+        if valor is None:
+            valor = gerar()
+            self._gravar_disco(chave, valor)
+        self._guardar(chave, valor)
+        return valor
+
+    def limpar(self):
+        with self._lock:
+            self._itens.clear()
+            self._ocupado = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    def _guardar(self, chave, valor):
+        tamanho = _tamanho(valor)
+        if tamanho > self.limite_bytes:
+            return
+        with self._lock:
+            if chave in self._itens:
+                self._ocupado -= self._itens.pop(chave)[1]
+            self._itens[chave] = (valor, tamanho)
+            self._ocupado += tamanho
+            while self._ocupado > self.limite_bytes:
+                _, (_, tamanho_antigo) = self._itens.popitem(last=False)
+                self._ocupado -= tamanho_antigo
+
+    def _caminho(self, chave, texto):
+        return os.path.join(self.pasta, chave + ('.txt' if texto else '.bin'))
+
+    def _indexar_disco(self):
+        """Monta o índice LRU do disco a partir da pasta e poda o que passar do limite."""
+        arquivos = []
+        with os.scandir(self.pasta) as entradas:
+            for entrada in entradas:
+                if not entrada.is_file():
+                    continue
+                if not entrada.name.endswith(('.bin', '.txt')):
+                    if entrada.name.startswith(tempfile.gettempprefix()):
+                        # Sobra de gravação interrompida (tempfile.mkstemp)
+                        _remover(entrada.path)
+                    continue
+                info = entrada.stat()
+                arquivos.append((info.st_mtime, entrada.name, info.st_size))
+        with self._lock:
+            for _, nome, tamanho in sorted(arquivos):
+                self._disco[nome] = tamanho
+                self._ocupado_disco += tamanho
+            self._podar_disco()
+
+    def _registrar_disco(self, nome, tamanho=None):
+        with self._lock:
+            if tamanho is None:
+                if nome in self._disco:
+                    self._disco.move_to_end(nome)
+                return
+            self._ocupado_disco += tamanho - self._disco.pop(nome, 0)
+            self._disco[nome] = tamanho
+            self._podar_disco()
+
+    def _podar_disco(self):
+        while self._ocupado_disco > self.limite_disco_bytes and self._disco:
+            nome, tamanho = self._disco.popitem(last=False)
+            self._ocupado_disco -= tamanho
+            _remover(os.path.join(self.pasta, nome))
+
+    def _ler_disco(self, chave):
+        if not self.pasta:
+            return None
+        for texto in (False, True):
+            caminho = self._caminho(chave, texto)
+            try:
+                with open(caminho, 'rb') as arquivo:
+                    dados = arquivo.read()
+            except FileNotFoundError:
+                continue
+            with contextlib.suppress(OSError):
+                os.utime(caminho)
+            self._registrar_disco(os.path.basename(caminho))
+            return dados.decode('utf-8') if texto else dados
+        return None
+
+    def _gravar_disco(self, chave, valor):
+        if not self.pasta:
+            return
+        texto = isinstance(valor, str)
+        dados = valor.encode('utf-8') if texto else valor
+        if len(dados) > self.limite_disco_bytes:
+            return
+        fd, parcial = tempfile.mkstemp(dir=self.pasta)
+        try:
+            with os.fdopen(fd, 'wb') as arquivo:
+                arquivo.write(dados)
+            caminho = self._caminho(chave, texto)
+            os.replace(parcial, caminho)
+        except OSError:
+            # A persistência é opcional: sem disco, o artefato fica só na memória.
+            if os.path.exists(parcial):
+                os.unlink(parcial)
+            return
+        self._registrar_disco(os.path.basename(caminho), len(dados))
+
+
+def _remover(caminho):
+    try:
+        os.unlink(caminho)
+    except FileNotFoundError:
+        pass
+
+
+def _tamanho(valor):
+    return len(valor.encode('utf-8')) if isinstance(valor, str) else len(valor)
+
+
+def chave_artefato(*partes):
+    """Hash estável (SHA-256) das entradas de um documento."""
+    bruto = json.dumps(partes, sort_keys=True, ensure_ascii=False, default=_serializavel)
+    return hashlib.sha256(bruto.encode('utf-8')).hexdigest()
+
+
+def _serializavel(valor):
+    if dataclasses.is_dataclass(valor):
+        return dataclasses.asdict(valor)
+    if isinstance(valor, collections.abc.Iterable) and not isinstance(valor, (str, bytes)):
+        return list(valor)
+    return str(valor)
+
+
+def chave_proposta(tipo, cliente, contrato, duracao, carrinho, total, roi_data):
+    logo = obter_ativo(ARQUIVO_LOGO)
+    mtime_logo = logo.mtime if logo else None
+    return chave_artefato(tipo, cliente, contrato, duracao, carrinho, total,
+                          roi_data['titulo'], roi_data['texto'], roi_data['pdf_text'], mtime_logo)
+
+
+cache_propostas = CacheArtefatos(pasta=PASTA_CACHE)
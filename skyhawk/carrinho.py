@@ -0,0 +1,136 @@
+from dataclasses import asdict, dataclass
+
+EMPRESA_SKYHAWK = "SkyHawk Security"
+EMPRESA_AMAZING = "AmazingDrone Solutions"
+CONTRATO_HIBRIDO = "CONTRATO HÍBRIDO"
+
+SERVICOS = ("Monitoramento", "Volumetria", "Inspeções", "Mapeamento")
+
+
+def empresa_destino(fat_sky, fat_amz):
+    if fat_sky > 0 and fat_amz > 0:
+        return CONTRATO_HIBRIDO
+    elif fat_amz > 0:
+        return EMPRESA_AMAZING
+    return EMPRESA_SKYHAWK
+
+
+def calcular_totais(carrinho):
+    """(total, fat_sky, fat_amz, empresa) de um carrinho.
+
+    Um Carrinho já tem os totais prontos. Para listas de dicts (pedidos em
+    lote, importação de históricos) a empresa sai do tipo de serviço do item.
+    """
+    if isinstance(carrinho, Carrinho):
+        return carrinho.totais()
+    total = 0.0
+    fat_sky = 0.0
+    fat_amz = 0.0
+    for item in carrinho:
+        total += item['valor_total']
+        if _empresa_item(item) == EMPRESA_SKYHAWK:
+            fat_sky += item['valor_total']
+        else:
+            fat_amz += item['valor_total']
+    return total, fat_sky, fat_amz, empresa_destino(fat_sky, fat_amz)
+
+
+def _empresa_item(item):
+    if isinstance(item, ItemCarrinho):
+        return item.empresa
+    return EMPRESA_SKYHAWK if servico_item(item) == "Monitoramento" else EMPRESA_AMAZING
+
+
+def tipo_servico(nome):
+    """Tipo de serviço (linha do catálogo) a partir do nome exibido no carrinho."""
+    for servico in SERVICOS:
+        if nome.startswith(servico):
+            return servico
+    return nome
+
+
+def servico_item(item):
+    """Tipo de serviço de um item: o gravado nele ou, em dicts antigos, o deduzido do nome."""
+    return item.get('servico') or tipo_servico(item['nome'])
+
+
+# =============================================================================
+# CARRINHO TIPADO
+# =============================================================================
+@dataclass(slots=True)
+class ItemCarrinho:
+    """Item do carrinho, marcado com a empresa dona do serviço ao ser criado.
+
+    Aceita ``item['nome']``/``item.get('servico')`` como os dicts antigos, para
+    os geradores de documentos e a gravação servirem aos dois formatos.
+    """
+    nome: str
+    servico: str
+    qtd: int
+    unidade: str
+    valor_unit: float
+    valor_total: float
+    empresa: str
+
+    def __getitem__(self, campo):
+        return getattr(self, campo)
+
+    def get(self, campo, padrao=None):
+        return getattr(self, campo, padrao)
+
+    def como_dict(self):
+        return asdict(self)
+
+
+class Carrinho:
+    """Itens da proposta com os totais por empresa mantidos a cada inclusão/remoção.
+
+    Os totais são lidos sem percorrer os itens. Ao esvaziar a parte de uma
+    empresa, o faturamento dela volta a zero exato, sem resíduo de ponto
+    flutuante que mude a empresa de destino.
+    """
+
+    __slots__ = ('itens', 'total', 'fat_sky', 'fat_amz', '_qtd_sky', '_qtd_amz')
+
+    def __init__(self, itens=()):
+        self.itens = []
+        self.total = self.fat_sky = self.fat_amz = 0.0
+        self._qtd_sky = self._qtd_amz = 0
+        for item in itens:
+            self.adicionar(item)
+
+    @property
+    def empresa(self):
+        return empresa_destino(self.fat_sky, self.fat_amz)
+
+    def totais(self):
+        return self.total, self.fat_sky, self.fat_amz, self.empresa
+
+    def adicionar(self, item):
+        self.itens.append(item)
+        self._somar(item, 1)
+        return item
+
+    def remover(self, indice):
+        item = self.itens.pop(indice)
+        self._somar(item, -1)
+        return item
+
+    def _somar(self, item, sinal):
+        valor = sinal * item.valor_total
+        if item.empresa == EMPRESA_SKYHAWK:
+            self._qtd_sky += sinal
+            self.fat_sky = self.fat_sky + valor if self._qtd_sky else 0.0
+        else:
+            self._qtd_amz += sinal
+            self.fat_amz = self.fat_amz + valor if self._qtd_amz else 0.0
+        self.total = self.total + valor if self.itens else 0.0
+
+    def __len__(self):
+        return len(self.itens)
+
+    def __iter__(self):
+        return iter(self.itens)
+
+    def __getitem__(self, indice):
+        return self.itens[indice]
@@ -0,0 +1,134 @@
+import argparse
+import csv
+import sys
+
+from skyhawk.config import PASTA_SNAPSHOTS
+from skyhawk.exportacao import estado_snapshot, exportar_snapshot
+from skyhawk.importacao import TAMANHO_LOTE, importar_contratos
+from skyhawk.lote import FORMATOS, gerar_lote, ler_pedidos
+
+
+# =============================================================================
+# PROPOSTAS EM LOTE
+# =============================================================================
+def _comando_propostas(args):
+    pedidos = ler_pedidos(args.entrada)
+    formatos = tuple(args.formatos.split(','))
+
+    def progresso(feitos, total, resultado):
+        situacao = resultado['erro'] or f"{len(resultado['arquivos'])} arquivo(s)"
+        print(f"[{feitos:>{len(str(total))}}/{total}] {resultado['cliente']}: {situacao}", file=sys.stderr)
+
+    resultados = gerar_lote(pedidos, args.saida, formatos, args.processos, progresso)
+    falhas = sum(1 for resultado in resultados if resultado['erro'])
+    print(f"{len(resultados) - falhas} proposta(s) geradas em {args.saida}, {falhas} com erro.", file=sys.stderr)
+    return 1 if falhas else 0
+
+
+# =============================================================================
+# IMPORTAÇÃO DE CONTRATOS HISTÓRICOS
+# =============================================================================
+def _comando_importar(args):
+    def progresso(linhas, contratos):
+        print(f"{linhas} linha(s) lidas, {contratos} contrato(s) válidos", file=sys.stderr)
+
+    resultado = importar_contratos(args.arquivo, simulacao=args.simulacao, tamanho_lote=args.lote, progresso=progresso)
+    rejeitadas = resultado['rejeitadas']
+    for linha, motivo in rejeitadas[:args.mostrar]:
+        print(f"linha {linha}: {motivo}", file=sys.stderr)
+    if len(rejeitadas) > args.mostrar:
+        print(f"... e mais {len(rejeitadas) - args.mostrar} linha(s) rejeitadas", file=sys.stderr)
+    if args.rejeitadas:
+        with open(args.rejeitadas, 'w', newline='', encoding='utf-8') as arquivo:
+            escritor = csv.writer(arquivo)
+            escritor.writerow(("linha", "motivo"))
+            escritor.writerows(rejeitadas)
+
+    acao = "validados (simulação, nada gravado)" if args.simulacao else "importados"
+    contratos = resultado['contratos'] if args.simulacao else resultado['importados']
+    print(f"{contratos} contrato(s) {acao}; {resultado['linhas']} linha(s) lidas, {len(rejeitadas)} rejeitada(s).",
+          file=sys.stderr)
+    return 1 if rejeitadas else 0
+
+
+# =============================================================================
+# SNAPSHOT ANALÍTICO (PARQUET)
+# =============================================================================
+def _comando_exportar(args):
+    novas = exportar_snapshot(args.pasta)
+    estado = estado_snapshot(args.pasta)
+    print(f"{novas} proposta(s) nova(s) exportadas para {args.pasta}; "
+          f"snapshot com {estado['linhas']} linha(s) até o id {estado['ultimo_id']}.", file=sys.stderr)
+    return 0
+
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def _inteiros(texto):
+    return tuple(int(valor) for valor in texto.split(',') if valor.strip())
+
+
+def _comando_benchmark(args):
+    from skyhawk import benchmark
+
+    def progresso(chave, medida):
+        memoria = f", pico {medida['pico_mb']:.1f} MB" if 'pico_mb' in medida else ""
+        print(f"{chave}: {medida['mediana_s'] * 1000:.2f} ms (mediana de {medida['execucoes']}){memoria}",
+              file=sys.stderr)
+
+    resultados = benchmark.executar(_inteiros(args.bancos), _inteiros(args.carrinhos), args.repeticoes,
+                                    pular=set(args.pular.split(',')) if args.pular else (), pasta=args.pasta,
+                                    progresso=progresso)
+    benchmark.salvar_resultados(resultados, args.saida)
+    print(f"Resultados gravados em {args.saida}.", file=sys.stderr)
+    if not args.comparar:
+        return 0
+
+    comparacao = benchmark.comparar(resultados, benchmark.carregar_resultados(args.comparar), args.tolerancia)
+    for linha in comparacao:
+        marca = "REGRESSÃO" if linha['regressao'] else ""
+        print(f"{linha['chave']:<45} {linha['base_s'] * 1000:>10.2f} ms -> {linha['atual_s'] * 1000:>10.2f} ms "
+              f"({linha['razao']:.2f}x) {marca}", file=sys.stderr)
+    regressoes = sum(1 for linha in comparacao if linha['regressao'])
+    print(f"{regressoes} regressão(ões) acima de {args.tolerancia:.0%} em relação a {args.comparar}.", file=sys.stderr)
+    return 1 if regressoes else 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m skyhawk", description="Ferramentas do CRM Amazing SkyHawk sem a interface.")
+    comandos = parser.add_subparsers(dest="comando", required=True)
+
+    propostas = comandos.add_parser("propostas", help="gera propostas PDF/HTML a partir de um CSV ou JSON de clientes")
+    propostas.add_argument("entrada", help="arquivo .json ou .csv com os pedidos")
+    propostas.add_argument("-o", "--saida", default="propostas", help="pasta de destino (padrão: ./propostas)")
+    propostas.add_argument("-j", "--processos", type=int, default=None,
+                           help="processos de renderização (padrão: núcleos da máquina)")
+    propostas.add_argument("-f", "--formatos", default=",".join(FORMATOS), help="pdf, html ou pdf,html")
+    propostas.set_defaults(executar=_comando_propostas)
+
+    importar = comandos.add_parser("importar", help="importa contratos históricos de um CSV ou XLSX")
+    importar.add_argument("arquivo", help="planilha .csv ou .xlsx, uma linha por item de contrato")
+    importar.add_argument("-n", "--simulacao", action="store_true", help="só valida e relata as linhas rejeitadas")
+    importar.add_argument("--lote", type=int, default=TAMANHO_LOTE, help=f"linhas por transação (padrão: {TAMANHO_LOTE})")
+    importar.add_argument("--rejeitadas", help="grava as linhas rejeitadas (linha, motivo) neste CSV")
+    importar.add_argument("--mostrar", type=int, default=20, help="quantas rejeições listar no terminal (padrão: 20)")
+    importar.set_defaults(executar=_comando_importar)
+
+    exportar = comandos.add_parser("exportar", help="exporta as propostas novas para o snapshot Parquet")
+    exportar.add_argument("-o", "--pasta", default=PASTA_SNAPSHOTS, help=f"pasta do snapshot (padrão: {PASTA_SNAPSHOTS})")
+    exportar.set_defaults(executar=_comando_exportar)
+
+    bench = comandos.add_parser("benchmark", help="mede os caminhos críticos em bancos e carrinhos sintéticos")
+    bench.add_argument("-o", "--saida", default="benchmark.json", help="arquivo JSON de resultados (padrão: ./benchmark.json)")
+    bench.add_argument("--comparar", help="resultados de referência (linha de base) para comparar")
+    bench.add_argument("--tolerancia", type=float, default=0.20, help="piora aceita antes de acusar regressão (padrão: 0.20)")
+    bench.add_argument("--bancos", default="1000,100000,1000000", help="propostas por banco sintético (padrão: 1000,100000,1000000)")
+    bench.add_argument("--carrinhos", default="1,10,100,500", help="itens por carrinho sintético (padrão: 1,10,100,500)")
+    bench.add_argument("-r", "--repeticoes", type=int, default=5, help="execuções por operação (padrão: 5)")
+    bench.add_argument("--pular", help="operações a ignorar, separadas por vírgula (ex.: relatorio_geral_pdf)")
+    bench.add_argument("--pasta", help="onde criar os bancos temporários (padrão: diretório temporário do sistema)")
+    bench.set_defaults(executar=_comando_benchmark)
+
+    args = parser.parse_args(argv)
+    return args.executar(args)
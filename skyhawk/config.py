@@ -0,0 +1,15 @@
+import os
+
+PASTA_RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ARQUIVO_LOGO = os.path.join(PASTA_RAIZ, "logo_holding.png")
+
+# Cache de propostas geradas (PDF/HTML): limite em memória e pasta opcional em disco
+LIMITE_CACHE_MB = int(os.environ.get("SKYHAWK_CACHE_MB", "64"))
+PASTA_CACHE = os.environ.get("SKYHAWK_CACHE_DIR") or None
+LIMITE_CACHE_DISCO_MB = int(os.environ.get("SKYHAWK_CACHE_DISCO_MB", "512"))
+
+# Snapshots Parquet para análise (exportação incremental de propostas)
+PASTA_SNAPSHOTS = os.environ.get("SKYHAWK_SNAPSHOT_DIR") or os.path.join(PASTA_RAIZ, "snapshots")
+
+# Painel de desempenho (métricas e cProfile) na barra lateral; desligado sem token
+TOKEN_ADMIN = os.environ.get("SKYHAWK_ADMIN_TOKEN") or None
@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import threading
+
+from skyhawk.banco import instantaneo
+from skyhawk.config import PASTA_SNAPSHOTS
+from skyhawk.metricas import medido
+
+TAMANHO_LOTE = 50000
+ARQUIVO_ESTADO = "_estado.json"
+PARTICOES = ("mes", "empresa_destino")
+
+SQL_NOVAS = """
+    SELECT id, cliente, tipo_contrato, duracao_meses, resumo_servicos, valor_total, fat_amazing, fat_skyhawk,
+           data_registro, registrado_em,
+           IFNULL(substr(registrado_em, 1, 7), 'sem_data') AS mes,
+           IFNULL(empresa_destino, 'sem_empresa') AS empresa_destino
+    FROM propostas
+    WHERE id > ?
+    ORDER BY id
+"""
+
+_lock_exportacao = threading.Lock()
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.fs
+    except ImportError:
+        raise ImportError("Os snapshots analíticos requerem o pacote pyarrow") from None
+    return pyarrow
+
+
+def _esquema(pa):
+    return pa.schema([
+        ("id", pa.int64()),
+        ("cliente", pa.string()),
+        ("tipo_contrato", pa.string()),
+        ("duracao_meses", pa.int64()),
+        ("resumo_servicos", pa.string()),
+        ("valor_total", pa.float64()),
+        ("fat_amazing", pa.float64()),
+        ("fat_skyhawk", pa.float64()),
+        ("data_registro", pa.string()),
+        ("registrado_em", pa.timestamp('s')),
+        ("mes", pa.string()),
+        ("empresa_destino", pa.string()),
+    ])
+
+
+def _particionamento(pa):
+    esquema = _esquema(pa)
+    return pa.dataset.partitioning(pa.schema([esquema.field(coluna) for coluna in PARTICOES]), flavor="hive")
+
+
+# =============================================================================
+# ESTADO (MARCA D'ÁGUA)
+# =============================================================================
+def estado_snapshot(pasta=None):
+    """``{"ultimo_id": ..., "linhas": ...}`` da última exportação (zeros se nunca exportou)."""
+    try:
+        with open(os.path.join(pasta or PASTA_SNAPSHOTS, ARQUIVO_ESTADO), encoding='utf-8') as arquivo:
+            return json.load(arquivo)
+    except FileNotFoundError:
+        return {"ultimo_id": 0, "linhas": 0}
+
+
+def _gravar_estado(pasta, estado):
+    fd, parcial = tempfile.mkstemp(dir=pasta, prefix="_", suffix=".parcial")
+    with os.fdopen(fd, 'w', encoding='utf-8') as arquivo:
+        json.dump(estado, arquivo)
+    os.replace(parcial, os.path.join(pasta, ARQUIVO_ESTADO))
+
+
+# =============================================================================
+# EXPORTAÇÃO INCREMENTAL
+# =============================================================================
+@medido
+def exportar_snapshot(pasta=None, tamanho_lote=TAMANHO_LOTE):
+    """Acrescenta ao snapshot Parquet as propostas gravadas desde a última exportação.
+
+    Os arquivos ficam particionados no estilo Hive por mês de registro e
+    empresa (``mes=2024-05/empresa_destino=.../``). As linhas são lidas em
+    lotes de ``tamanho_lote``, mas vão para uma única escrita: cada
+    exportação grava um arquivo por partição tocada, não um por lote. A
+    marca d'água (último id exportado) só avança depois de todos os arquivos
+    gravados; se a exportação cair no meio, a próxima regrava os mesmos
+    arquivos. Retorna a quantidade de linhas novas.
+    """
+    pa = _pyarrow()
+    pasta = pasta or PASTA_SNAPSHOTS
+    os.makedirs(pasta, exist_ok=True)
+    esquema = _esquema(pa)
+
+    with _lock_exportacao:
+        estado = estado_snapshot(pasta)
+        novas, ultimo_id = 0, estado['ultimo_id']
+        with instantaneo() as conn:
+            cursor = conn.execute(SQL_NOVAS, (ultimo_id,))
+            linhas = cursor.fetchmany(tamanho_lote)
+            if linhas:
+                primeiro_id = linhas[0][0]
+
+                def lotes(linhas):
+                    nonlocal novas, ultimo_id
+                    while linhas:
+                        colunas = dict(zip(esquema.names, zip(*linhas)))
+                        colunas['registrado_em'] = pa.array(colunas['registrado_em'], pa.string()).cast(
+                            pa.timestamp('s'))
+                        yield pa.RecordBatch.from_pydict(colunas, schema=esquema)
+                        novas += len(linhas)
+                        ultimo_id = linhas[-1][0]
+                        linhas = cursor.fetchmany(tamanho_lote)
+
+                pa.dataset.write_dataset(
+                    lotes(linhas), pasta, schema=esquema, format="parquet",
+                    partitioning=_particionamento(pa),
+                    basename_template=f"propostas-{primeiro_id:010d}-{{i}}.parquet",
+                    existing_data_behavior="overwrite_or_ignore",
+                )
+        if novas:
+            _gravar_estado(pasta, {"ultimo_id": ultimo_id, "linhas": estado['linhas'] + novas})
+    return novas
+
+
+# =============================================================================
+# LEITURA (ARROW COM MEMORY MAP)
+# =============================================================================
+def abrir_snapshot(pasta=None):
+    """Dataset Arrow do snapshot, lido com memory map (None se ainda não houve exportação)."""
+    pa = _pyarrow()
+    pasta = pasta or PASTA_SNAPSHOTS
+    if not estado_snapshot(pasta)['ultimo_id']:
+        return None
+    return pa.dataset.dataset(pasta, format="parquet", partitioning=_particionamento(pa), schema=_esquema(pa),
+                              filesystem=pa.fs.LocalFileSystem(use_mmap=True), ignore_prefixes=[".", "_"])
+
+
+@medido
+def faturamento_historico(pasta=None, colunas_grupo=("mes", "empresa_destino")):
+    """Receita e contratos agregados no Arrow sobre o snapshot, sem tocar no SQLite."""
+    dataset = abrir_snapshot(pasta)
+    if dataset is None:
+        return None
+    tabela = dataset.to_table(columns=list(colunas_grupo) + ["valor_total", "fat_skyhawk", "fat_amazing", "id"])
+    agregado = tabela.group_by(list(colunas_grupo)).aggregate([
+        ("id", "count"), ("valor_total", "sum"), ("fat_skyhawk", "sum"), ("fat_amazing", "sum"),
+    ])
+    return agregado.sort_by([(coluna, "ascending") for coluna in colunas_grupo]).to_pandas()
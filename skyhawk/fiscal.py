@@ -0,0 +1,143 @@
+import numpy as np
+
+from skyhawk.metricas import medido
+
+# Faixas do Simples Nacional pelo faturamento anual (limite superior inclusivo)
+LIMITES_FAIXA = np.array([180000.0, 360000.0, 720000.0])
+ROTULOS_FAIXA = np.array(["1 (Até 180k)", "2 (180k - 360k)", "3 (360k - 720k)", "4+ (Acima de 720k)"])
+ALIQUOTAS_ENGENHARIA = np.array([0.06, 0.112, 0.135, 0.16])
+ALIQUOTAS_SEGURANCA = np.array([0.045, 0.09, 0.102, 0.14])
+
+ALIQUOTA_ANEXO_V = 0.155
+FATOR_R_MINIMO = 0.28
+INSS_PATRONAL = 0.20
+PESO_FOLHA_SEGURANCA = 0.40
+
+REGIME_SEGURANCA = "Simples Nacional - Anexo IV"
+REGIME_ENGENHARIA = "Simples Nacional - Fator R"
+
+
+def _cenarios(faturamento_mensal, empresa_tipo, folha_mensal=None):
+    """Núcleo vetorizado: arrays de mesmo formato para cada coluna do cenário."""
+    fat = np.asarray(faturamento_mensal, dtype=float)
+    tipo = np.broadcast_to(np.asarray(empresa_tipo, dtype=object), fat.shape)
+    seg = tipo == "Seguranca"
+    eng = tipo == "Engenharia"
+
+    anual = fat * 12
+    faixa = np.searchsorted(LIMITES_FAIXA, anual, side='left')
+    aliquota = np.where(eng, ALIQUOTAS_ENGENHARIA[faixa], ALIQUOTAS_SEGURANCA[faixa])
+
+    imposto_simples = fat * aliquota
+    inss_patronal = np.where(seg, fat * PESO_FOLHA_SEGURANCA * INSS_PATRONAL, 0.0)
+    imposto_anexo_v = np.where(eng, fat * ALIQUOTA_ANEXO_V, np.nan)
+    folha_necessaria = np.where(eng, fat * FATOR_R_MINIMO, np.nan)
+
+    if folha_mensal is None:
+        # Sem folha informada, assume que a Amazing mantém o Fator R (Anexo III)
+        fator_r = np.full(fat.shape, np.nan)
+        custo_engenharia = imposto_simples
+        folha_faltante = np.full(fat.shape, np.nan)
+    else:
+        folha = np.broadcast_to(np.asarray(folha_mensal, dtype=float), fat.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fator_r = np.where(eng & (fat > 0), folha / fat, np.nan)
+        enquadra = fator_r >= FATOR_R_MINIMO
+        custo_engenharia = np.where(enquadra, imposto_simples, imposto_anexo_v)
+        folha_faltante = np.where(eng, np.maximum(folha_necessaria - folha, 0.0), np.nan)
+
+    return {
+        'empresa_tipo': tipo,
+        'faturamento_mensal': fat,
+        'faturamento_anual': anual,
+        'faixa': ROTULOS_FAIXA[faixa],
+        'aliquota': aliquota,
+        'regime_provavel': np.where(seg, REGIME_SEGURANCA, np.where(eng, REGIME_ENGENHARIA, "")),
+        'imposto_simples': imposto_simples,
+        'inss_patronal_est': inss_patronal,
+        'custo_total_est': np.select([seg, eng], [imposto_simples + inss_patronal, custo_engenharia], np.nan),
+        'imposto_anexo_v': imposto_anexo_v,
+        'economia_anexo_iii_vs_v': imposto_anexo_v - imposto_simples,
+        'folha_necessaria': folha_necessaria,
+        'fator_r': fator_r,
+        'folha_faltante': folha_faltante,
+    }
+
+
+@medido
+def calcular_cenarios_fiscais_lote(faturamento_mensal, empresa_tipo, folha_mensal=None):
+    """Cenário do Simples Nacional para uma série de faturamentos mensais.
+
+    ``empresa_tipo`` e ``folha_mensal`` podem ser escalares ou arrays do mesmo
+    tamanho. Com a folha informada, o custo da Engenharia segue o Fator R real
+    (Anexo III se folha/faturamento >= 28%, senão Anexo V).
+    """
+    import pandas as pd
+    indice = faturamento_mensal.index if isinstance(faturamento_mensal, pd.Series) else None
+    return pd.DataFrame(_cenarios(np.atleast_1d(faturamento_mensal), empresa_tipo, folha_mensal), index=indice)
+
+
+@medido
+def calcular_cenarios_fiscais_detalhado(faturamento_mensal, empresa_tipo):
+    cenario = {coluna: np.asarray(valores)[()] for coluna, valores in _cenarios(faturamento_mensal, empresa_tipo).items()}
+    analise = {}
+    analise['faixa'] = str(cenario['faixa'])
+    analise['faturamento_anual'] = faturamento_mensal * 12
+    dicas = []
+
+    if empresa_tipo == "Seguranca":
+        analise['regime_provavel'] = REGIME_SEGURANCA
+        analise['custo_total_est'] = float(cenario['custo_total_est'])
+        dicas.append("ANÁLISE DE RISCO (ANEXO IV): Monitoramento paga INSS Patronal (20%) à parte.")
+        dicas.append("RECOMENDAÇÃO: Avaliar Lucro Presumido se a folha for alta.")
+
+    elif empresa_tipo == "Engenharia":
+        analise['regime_provavel'] = REGIME_ENGENHARIA
+        analise['custo_total_est'] = float(cenario['custo_total_est'])
+        dicas.append(f"ESTRATÉGIA FATOR R: Mantenha folha acima de R$ {cenario['folha_necessaria']:,.2f} (28%).")
+        dicas.append(f"ECONOMIA: Aprox. R$ {cenario['economia_anexo_iii_vs_v']:,.2f} mensais vs Anexo V.")
+
+    analise['dicas'] = dicas
+    return analise
+
+
+@medido
+def serie_receita_recorrente(mes_inicio, duracao_meses, fat_skyhawk, fat_amazing, meses_projecao=12, ate=None):
+    """Receita recorrente mensal de cada empresa a partir dos contratos.
+
+    ``mes_inicio`` são strings "aaaa-mm"; cada contrato soma o seu valor mensal
+    do mês de início até o fim da vigência. A série cobre do primeiro contrato
+    até ``meses_projecao`` meses depois de ``ate`` (padrão: mês atual).
+    """
+    import pandas as pd
+    ordinais = pd.PeriodIndex(np.asarray(mes_inicio), freq='M').asi8
+    mes0 = pd.Period(ordinal=int(ordinais.min()), freq='M')
+    ate = pd.Period(ate, freq='M') if ate is not None else pd.Period.now('M')
+    pos_inicio = ordinais - mes0.ordinal
+    pos_fim = pos_inicio + np.asarray(duracao_meses, dtype=int)
+    n_meses = max(int(pos_inicio.max()), ate.ordinal - mes0.ordinal) + meses_projecao + 1
+
+    colunas = {}
+    for nome, valores in (('fat_skyhawk', fat_skyhawk), ('fat_amazing', fat_amazing)):
+        delta = np.zeros(n_meses + 1)
+        valores = np.asarray(valores, dtype=float)
+        np.add.at(delta, pos_inicio, valores)
+        np.add.at(delta, np.minimum(pos_fim, n_meses), -valores)
+        colunas[nome] = np.cumsum(delta)[:n_meses]
+
+    meses = pd.period_range(mes0, periods=n_meses, freq='M')
+    serie = pd.DataFrame(colunas, index=meses.astype(str))
+    serie['projetado'] = meses > ate
+    return serie
+
+
+@medido
+def cenarios_fiscais_mensais(serie, folha_amazing=None):
+    """Cenário fiscal mês a mês das duas empresas sobre uma série de serie_receita_recorrente."""
+    import pandas as pd
+    sky = calcular_cenarios_fiscais_lote(serie['fat_skyhawk'], "Seguranca")
+    amz = calcular_cenarios_fiscais_lote(serie['fat_amazing'], "Engenharia", folha_amazing)
+    sky['empresa'], amz['empresa'] = "SkyHawk Security", "AmazingDrone Solutions"
+    tabela = pd.concat([sky, amz]).rename_axis('mes').reset_index()
+    tabela['projetado'] = tabela['mes'].map(serie['projetado'])
+    return tabela.sort_values(['mes', 'empresa'], kind='stable', ignore_index=True)
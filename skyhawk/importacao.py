@@ -0,0 +1,266 @@
+import csv
+import datetime
+import functools
+import io
+import os
+import re
+import unicodedata
+
+from skyhawk.banco import salvar_vendas_lote
+from skyhawk.carrinho import calcular_totais
+from skyhawk.metricas import medido
+
+TAMANHO_LOTE = 20000
+COLUNAS_OBRIGATORIAS = ("cliente", "contrato", "duracao", "data", "servico", "valor_total")
+CHAVE_CONTRATO = ("cliente", "contrato", "duracao", "data")
+SINONIMOS = {
+    "tipo_contrato": "contrato",
+    "duracao_meses": "duracao",
+    "data_registro": "data",
+    "nome": "servico",
+    "valor": "valor_total",
+}
+# Só pontos em grupos de três: separador de milhar (30.000, 1.234.567), não decimal
+MILHAR = re.compile(r"-?\d{1,3}(\.\d{3})+")
+FORMATOS_DATA = ("%d/%m/%Y", "%Y-%m-%d", "%d/%m/%Y %H:%M:%S", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+# Pontuação tipográfica (Word/Excel) fora do latin-1, a codificação dos PDFs
+TIPOGRAFIA = str.maketrans({
+    "\u201c": '"', "\u201d": '"', "\u201e": '"', "\u2018": "'", "\u2019": "'", "\u201a": "'",
+    "\u2013": "-", "\u2014": "-", "\u2212": "-", "\u2026": "...", "\u2022": "-", "\u20ac": "EUR",
+})
+
+
+# =============================================================================
+# LEITURA EM FLUXO (CSV / XLSX)
+# =============================================================================
+def _coluna(nome):
+    nome = str(nome or '').strip().lower()
+    return SINONIMOS.get(nome, nome)
+
+
+def _linhas_csv(arquivo):
+    amostra = arquivo.read(4096)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=",;\t")
+    except csv.Error:
+        dialeto = csv.excel
+    leitor = csv.reader(arquivo, dialeto)
+    cabecalho = [_coluna(nome) for nome in next(leitor, [])]
+    yield 1, cabecalho
+    for valores in leitor:
+        if any(valor.strip() for valor in valores):
+            yield leitor.line_num, dict(zip(cabecalho, valores))
+
+
+def _linhas_xlsx(origem):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportError("Importar planilhas .xlsx requer o pacote openpyxl") from None
+    planilha = load_workbook(origem, read_only=True, data_only=True)
+    try:
+        linhas = planilha.active.iter_rows(values_only=True)
+        cabecalho = [_coluna(nome) for nome in next(linhas, ())]
+        yield 1, cabecalho
+        for numero, valores in enumerate(linhas, 2):
+            if any(valor not in (None, '') for valor in valores):
+                yield numero, dict(zip(cabecalho, valores))
+    finally:
+        planilha.close()
+
+
+def ler_linhas(origem, nome=None):
+    """Linhas ``(número, dict)`` de um CSV ou XLSX, sem carregar o arquivo inteiro.
+
+    ``origem`` é um caminho ou um arquivo binário aberto (ex.: upload do
+    Streamlit); o formato sai da extensão de ``nome`` ou do caminho. O
+    primeiro item é ``(1, cabeçalho)``.
+    """
+    nome = nome or (origem if isinstance(origem, (str, os.PathLike)) else getattr(origem, 'name', ''))
+    if str(nome).lower().endswith(('.xlsx', '.xlsm')):
+        yield from _linhas_xlsx(origem)
+        return
+    if isinstance(origem, (str, os.PathLike)):
+        with open(origem, newline='', encoding='utf-8-sig') as arquivo:
+            yield from _linhas_csv(arquivo)
+        return
+    texto = io.TextIOWrapper(origem, encoding='utf-8-sig', newline='')
+    try:
+        yield from _linhas_csv(texto)
+    finally:
+        texto.detach()
+
+
+# =============================================================================
+# VALIDAÇÃO
+# =============================================================================
+def _texto(valor):
+    return '' if valor is None else str(valor).strip()
+
+
+def _texto_pdf(valor, campo):
+    """Texto que vai para os PDFs: aspas e travessões tipográficos viram ASCII; o resto precisa caber no latin-1."""
+    texto = unicodedata.normalize('NFC', _texto(valor)).translate(TIPOGRAFIA)
+    try:
+        texto.encode('latin-1')
+    except UnicodeEncodeError as erro:
+        raise ValueError(f"{campo} com caractere não suportado: {texto[erro.start]!r}") from None
+    return texto
+
+
+def _numero(valor):
+    """Número de uma célula no formato brasileiro (1.234,56 ou 30.000); ValueError com o motivo."""
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    texto = _texto(valor).replace('R$', '').replace(' ', '').replace('\xa0', '')
+    if ',' in texto:
+        if '.' in texto and texto.rindex('.') > texto.rindex(','):
+            raise ValueError("vírgula antes do ponto é ambíguo; use 1.234,56")
+        # Formato brasileiro: 1.234,56
+        texto = texto.replace('.', '').replace(',', '.')
+    elif MILHAR.fullmatch(texto):
+        texto = texto.replace('.', '')
+    try:
+        return float(texto)
+    except ValueError:
+        raise ValueError("não é um número") from None
+
+
+def _data(valor):
+    if isinstance(valor, datetime.datetime):
+        return valor
+    if isinstance(valor, datetime.date):
+        return datetime.datetime.combine(valor, datetime.time())
+    return _data_texto(_texto(valor))
+
+
+@functools.lru_cache(maxsize=4096)
+def _data_texto(texto):
+    # Históricos repetem poucas datas; o strptime é a parte cara da validação
+    for formato in FORMATOS_DATA:
+        try:
+            return datetime.datetime.strptime(texto, formato)
+        except ValueError:
+            pass
+    raise ValueError(f"data inválida: {texto!r}")
+
+
+def validar_linha(linha):
+    """Chave do contrato e item de carrinho de uma linha; ValueError com o motivo se inválida."""
+    cliente = _texto_pdf(linha.get('cliente'), "cliente")
+    contrato = _texto_pdf(linha.get('contrato'), "contrato")
+    servico = _texto_pdf(linha.get('servico'), "serviço")
+    if not cliente:
+        raise ValueError("cliente vazio")
+    if not contrato:
+        raise ValueError("contrato vazio")
+    if not servico:
+        raise ValueError("serviço vazio")
+    try:
+        duracao = int(_numero(linha.get('duracao')))
+    except ValueError as erro:
+        raise ValueError(f"duração inválida: {linha.get('duracao')!r} ({erro})") from None
+    if duracao <= 0:
+        raise ValueError(f"duração inválida: {duracao}")
+    try:
+        valor_total = _numero(linha.get('valor_total'))
+    except ValueError as erro:
+        raise ValueError(f"valor inválido: {linha.get('valor_total')!r} ({erro})") from None
+    if valor_total < 0:
+        raise ValueError(f"valor negativo: {valor_total}")
+    qtd = _texto(linha.get('qtd'))
+    try:
+        qtd = int(_numero(qtd)) if qtd else 1
+    except ValueError as erro:
+        raise ValueError(f"quantidade inválida: {linha.get('qtd')!r} ({erro})") from None
+    if qtd <= 0:
+        raise ValueError(f"quantidade inválida: {qtd}")
+
+    chave = (cliente, contrato, duracao, _data(linha.get('data')))
+    item = {"nome": servico, "qtd": qtd, "unidade": _texto_pdf(linha.get('unidade'), "unidade") or None,
+            "valor_unit": valor_total / qtd, "valor_total": valor_total}
+    return chave, item
+
+
+def _venda(chave, itens):
+    cliente, contrato, duracao, registrado_em = chave
+    total, fat_sky, fat_amz, empresa = calcular_totais(itens)
+    return {"cliente": cliente, "contrato": contrato, "duracao": duracao,
+            "servicos": ", ".join(item['nome'] for item in itens), "total": total, "fat_amz": fat_amz,
+            "fat_sky": fat_sky, "empresa": empresa, "itens": itens, "registrado_em": registrado_em}
+
+
+def contratos(linhas):
+    """Agrupa linhas consecutivas com o mesmo (cliente, contrato, duração, data) em contratos.
+
+    Gera ``(venda, rejeitadas)``: a venda pronta para salvar_vendas_lote, ou
+    None quando alguma linha do contrato é inválida; ``rejeitadas`` lista
+    ``(linha, motivo)``.
+    """
+    atual, grupo = None, []
+
+    def fechar():
+        erros = [(numero, motivo) for numero, _, motivo in grupo if motivo]
+        if erros:
+            primeira = erros[0][0]
+            erros += [(numero, f"contrato rejeitado (linha {primeira} inválida)") for numero, _, motivo in grupo if not motivo]
+            return None, sorted(erros)
+        return _venda(grupo[0][1][0], [item for _, (_, item), _ in grupo]), []
+
+    for numero, linha in linhas:
+        chave = tuple(_texto(linha.get(coluna)) for coluna in CHAVE_CONTRATO)
+        if grupo and chave != atual:
+            yield fechar()
+            grupo = []
+        atual = chave
+        try:
+            grupo.append((numero, validar_linha(linha), None))
+        except ValueError as erro:
+            grupo.append((numero, None, str(erro)))
+    if grupo:
+        yield fechar()
+
+
+# =============================================================================
+# IMPORTAÇÃO
+# =============================================================================
+@medido
+def importar_contratos(origem, nome=None, simulacao=False, tamanho_lote=TAMANHO_LOTE, progresso=None):
+    """Importa contratos históricos de um CSV/XLSX (uma linha por item do contrato).
+
+    Colunas: cliente, contrato, duracao, data, servico, valor_total e as
+    opcionais qtd e unidade. Cada contrato é classificado entre SkyHawk e
+    Amazing por calcular_totais e gravado com salvar_vendas_lote, uma
+    transação a cada ``tamanho_lote`` linhas. Com ``simulacao`` nada é gravado.
+    ``progresso(linhas_lidas, contratos_validos)`` é chamado a cada lote.
+    """
+    linhas = ler_linhas(origem, nome)
+    _, cabecalho = next(linhas, (1, []))
+    faltando = [coluna for coluna in COLUNAS_OBRIGATORIAS if coluna not in cabecalho]
+    if faltando:
+        raise ValueError(f"Colunas obrigatórias ausentes: {', '.join(faltando)}")
+
+    resultado = {"linhas": 0, "contratos": 0, "importados": 0, "rejeitadas": []}
+    lote, linhas_lote = [], 0
+
+    def gravar():
+        if not simulacao:
+            resultado['importados'] += salvar_vendas_lote(lote)
+        if progresso:
+            progresso(resultado['linhas'], resultado['contratos'])
+
+    for venda, rejeitadas in contratos(linhas):
+        n_linhas = len(venda['itens']) if venda else len(rejeitadas)
+        resultado['linhas'] += n_linhas
+        if venda is None:
+            resultado['rejeitadas'].extend(rejeitadas)
+            continue
+        resultado['contratos'] += 1
+        lote.append(venda)
+        linhas_lote += n_linhas
+        if linhas_lote >= tamanho_lote:
+            gravar()
+            lote, linhas_lote = [], 0
+    gravar()
+    return resultado
@@ -0,0 +1,140 @@
+import concurrent.futures
+import csv
+import json
+import os
+import re
+
+from skyhawk.carrinho import calcular_totais
+from skyhawk.precos import carregar_catalogo, cotar
+from skyhawk.propostas import escrever_proposta_html, gerar_proposta_pdf
+from skyhawk.roi import gerar_analise_roi
+
+FORMATOS = ("pdf", "html")
+COLUNAS_CHAVE_CSV = ("cliente", "contrato", "duracao")
+
+
+# =============================================================================
+# LEITURA DOS PEDIDOS
+# =============================================================================
+def ler_pedidos(caminho):
+    """Lista de pedidos ``{"cliente", "contrato", "duracao", "itens"}`` de um JSON ou CSV.
+
+    JSON: lista de pedidos (ou ``{"propostas": [...]}``); cada item é uma
+    especificação de montar_item ou um item de carrinho já montado (com
+    ``valor_total``). CSV: uma linha por item, com as colunas cliente,
+    contrato, duracao, servico e as opcionais rondas_extras, volumes, baterias,
+    qtd e valor; linhas com o mesmo (cliente, contrato, duracao) formam um pedido.
+    """
+    if caminho.lower().endswith('.csv'):
+        return _ler_csv(caminho)
+    with open(caminho, encoding='utf-8') as arquivo:
+        dados = json.load(arquivo)
+    return dados['propostas'] if isinstance(dados, dict) else dados
+
+
+def _ler_csv(caminho):
+    pedidos = {}
+    with open(caminho, newline='', encoding='utf-8-sig') as arquivo:
+        for linha in csv.DictReader(arquivo):
+            linha = {coluna.strip(): (valor or '').strip() for coluna, valor in linha.items() if coluna}
+            chave = tuple(linha[coluna] for coluna in COLUNAS_CHAVE_CSV)
+            # Duração fora do padrão (ex.: "36 meses") segue como texto e vira erro só desse pedido
+            duracao = int(chave[2]) if chave[2].isdigit() else chave[2]
+            pedido = pedidos.setdefault(chave, {"cliente": chave[0], "contrato": chave[1],
+                                                "duracao": duracao, "itens": []})
+            pedido['itens'].append({coluna: valor for coluna, valor in linha.items()
+                                    if coluna not in COLUNAS_CHAVE_CSV and valor != ''})
+    return list(pedidos.values())
+
+
+def preparar_pedido(pedido, catalogo=None):
+    """Monta o carrinho, os totais por empresa e a análise de ROI de um pedido."""
+    try:
+        duracao = int(pedido['duracao'])
+    except (TypeError, ValueError):
+        raise ValueError(f"duração inválida: {pedido['duracao']!r} (informe só os meses, ex.: 36)") from None
+    itens = pedido['itens']
+    if itens and all('valor_total' in item for item in itens):
+        total, fat_sky, fat_amz, empresa = calcular_totais(itens)
+        cotacao = {"itens": itens, "total": total, "fat_sky": fat_sky, "fat_amz": fat_amz, "empresa": empresa}
+    else:
+        cotacao = cotar({"contrato": pedido['contrato'], "duracao": duracao, "itens": itens}, catalogo)
+    cotacao.update(cliente=pedido['cliente'], contrato=pedido['contrato'], duracao=duracao,
+                   roi=gerar_analise_roi(pedido['contrato'], cotacao['total'], duracao))
+    return cotacao
+
+
+# =============================================================================
+# RENDERIZAÇÃO
+# =============================================================================
+def nome_arquivo(indice, cliente):
+    slug = re.sub(r'[^\w-]+', '_', cliente).strip('_') or "proposta"
+    return f"{indice:04d}_{slug}"
+
+
+def _renderizar(indice, cotacao, pasta, formatos):
+    """Executado nos processos filhos: gera e grava os documentos de uma proposta."""
+    argumentos = (cotacao['cliente'], cotacao['contrato'], cotacao['duracao'], cotacao['itens'],
+                  cotacao['total'], cotacao['roi'])
+    base = os.path.join(pasta, nome_arquivo(indice, cotacao['cliente']))
+    arquivos = []
+    if "pdf" in formatos:
+        with open(base + ".pdf", 'wb') as arquivo:
+            arquivo.write(gerar_proposta_pdf(*argumentos))
+        arquivos.append(base + ".pdf")
+    if "html" in formatos:
+        escrever_proposta_html(base + ".html", *argumentos)
+        arquivos.append(base + ".html")
+    return arquivos
+
+
+def gerar_lote(pedidos, pasta, formatos=FORMATOS, processos=None, progresso=None):
+    """Gera as propostas de vários clientes em ``pasta``, renderizando em paralelo.
+
+    ``processos`` é o número de processos do pool (padrão: núcleos da máquina;
+    1 renderiza no próprio processo). ``progresso(feitos, total, resultado)`` é
+    chamado a cada proposta concluída. Retorna um resultado por pedido, na
+    ordem de entrada, com ``arquivos`` ou ``erro``.
+    """
+    os.makedirs(pasta, exist_ok=True)
+    catalogo = carregar_catalogo()
+    resultados = []
+    for indice, pedido in enumerate(pedidos, 1):
+        resultado = {"indice": indice, "cliente": pedido.get('cliente', ''), "arquivos": [], "erro": None}
+        try:
+            resultado['cotacao'] = preparar_pedido(pedido, catalogo)
+        except (ArithmeticError, KeyError, TypeError, ValueError) as erro:
+            resultado['erro'] = f"pedido inválido: {erro!r}"
+        resultados.append(resultado)
+
+    feitos = 0
+
+    def concluir(resultado, tarefa=None):
+        nonlocal feitos
+        try:
+            if tarefa:
+                resultado['arquivos'] = tarefa()
+        except Exception as erro:
+            resultado['erro'] = repr(erro)
+        feitos += 1
+        if progresso:
+            progresso(feitos, len(resultados), resultado)
+
+    validos = []
+    for resultado in resultados:
+        if resultado['erro'] is None:
+            validos.append(resultado)
+        else:
+            concluir(resultado)
+
+    if processos == 1 or len(validos) <= 1:
+        for resultado in validos:
+            concluir(resultado, lambda r=resultado: _renderizar(r['indice'], r['cotacao'], pasta, formatos))
+        return resultados
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processos) as executor:
+        pendentes = {executor.submit(_renderizar, resultado['indice'], resultado['cotacao'], pasta, formatos): resultado
+                     for resultado in validos}
+        for futuro in concurrent.futures.as_completed(pendentes):
+            concluir(pendentes[futuro], futuro.result)
+    return resultados
@@ -0,0 +1,168 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+
+# Limites superiores (segundos) dos baldes do histograma de latência
+LIMITES_HISTOGRAMA_S = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PREFIXO_PROMETHEUS = "skyhawk_operacao"
+
+
+class Metricas:
+    """Contagem de chamadas, erros e histograma de latência por operação.
+
+    Chamadas aninhadas da mesma operação na mesma thread (funções que chamam
+    a si mesmas) são medidas uma vez só, pela chamada externa.
+    """
+
+    def __init__(self, limites=LIMITES_HISTOGRAMA_S):
+        self.limites = tuple(limites)
+        self._operacoes = {}
+        self._lock = threading.Lock()
+        self._ativas = threading.local()
+
+    def registrar(self, nome, duracao, erro=False):
+        with self._lock:
+            operacao = self._operacoes.get(nome)
+            if operacao is None:
+                operacao = self._operacoes[nome] = {
+                    "chamadas": 0, "erros": 0, "soma_s": 0.0, "max_s": 0.0, "baldes": [0] * (len(self.limites) + 1),
+                }
+            operacao["chamadas"] += 1
+            operacao["erros"] += erro
+            operacao["soma_s"] += duracao
+            operacao["max_s"] = max(operacao["max_s"], duracao)
+            operacao["baldes"][_balde(self.limites, duracao)] += 1
+
+    @contextlib.contextmanager
+    def medir(self, nome):
+        ativas = self._ativas.__dict__.setdefault("nomes", set())
+        if nome in ativas:
+            yield
+            return
+        ativas.add(nome)
+        inicio = time.perf_counter()
+        erro = False
+        try:
+            yield
+        except BaseException:
+            erro = True
+            raise
+        finally:
+            ativas.discard(nome)
+            self.registrar(nome, time.perf_counter() - inicio, erro)
+
+    def instantaneo(self):
+        """Cópia dos contadores: ``{operação: {chamadas, erros, soma_s, max_s, baldes}}``."""
+        with self._lock:
+            return {nome: dict(operacao, baldes=list(operacao["baldes"])) for nome, operacao in self._operacoes.items()}
+
+    def resumo(self):
+        """Uma linha por operação com média, percentis estimados pelos baldes e máximo (ms)."""
+        linhas = []
+        for nome, operacao in sorted(self.instantaneo().items()):
+            chamadas = operacao["chamadas"]
+            linhas.append({
+                "operacao": nome,
+                "chamadas": chamadas,
+                "erros": operacao["erros"],
+                "total_ms": operacao["soma_s"] * 1000,
+                "media_ms": operacao["soma_s"] / chamadas * 1000,
+                "p50_ms": self._percentil(operacao, 0.50) * 1000,
+                "p95_ms": self._percentil(operacao, 0.95) * 1000,
+                "max_ms": operacao["max_s"] * 1000,
+            })
+        return linhas
+
+    def _percentil(self, operacao, fracao):
+        alvo = fracao * operacao["chamadas"]
+        acumulado = 0
+        for limite, quantidade in zip(self.limites + (operacao["max_s"],), operacao["baldes"]):
+            acumulado += quantidade
+            if acumulado >= alvo:
+                return min(limite, operacao["max_s"])
+        return operacao["max_s"]
+
+    def como_json(self):
+        return json.dumps({"limites_s": self.limites, "operacoes": self.instantaneo()}, indent=2, ensure_ascii=False)
+
+    def como_prometheus(self):
+        """Formato texto de exposição do Prometheus (histograma + contador de erros)."""
+        nome_hist, nome_erros = f"{PREFIXO_PROMETHEUS}_segundos", f"{PREFIXO_PROMETHEUS}_erros_total"
+        linhas = [
+            f"# HELP {nome_hist} Latência das operações instrumentadas.",
+            f"# TYPE {nome_hist} histogram",
+        ]
+        operacoes = sorted(self.instantaneo().items())
+        for nome, operacao in operacoes:
+            rotulo = f'operacao="{_escapar_rotulo(nome)}"'
+            acumulado = 0
+            for limite, quantidade in zip(self.limites, operacao["baldes"]):
+                acumulado += quantidade
+                linhas.append(f'{nome_hist}_bucket{{{rotulo},le="{limite}"}} {acumulado}')
+            linhas.append(f'{nome_hist}_bucket{{{rotulo},le="+Inf"}} {operacao["chamadas"]}')
+            linhas.append(f'{nome_hist}_sum{{{rotulo}}} {operacao["soma_s"]!r}')
+            linhas.append(f'{nome_hist}_count{{{rotulo}}} {operacao["chamadas"]}')
+        linhas += [f"# HELP {nome_erros} Chamadas que terminaram com exceção.", f"# TYPE {nome_erros} counter"]
+        linhas += [f'{nome_erros}{{operacao="{_escapar_rotulo(nome)}"}} {operacao["erros"]}' for nome, operacao in operacoes]
+        return "\n".join(linhas) + "\n"
+
+    def limpar(self):
+        with self._lock:
+            self._operacoes.clear()
+
+
+def _balde(limites, duracao):
+    for indice, limite in enumerate(limites):
+        if duracao <= limite:
+            return indice
+    return len(limites)
+
+
+def _escapar_rotulo(valor):
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+metricas = Metricas()
+
+
+def medir(nome):
+    """Context manager: ``with medir("relatorios.cabecalho"): ...``."""
+    return metricas.medir(nome)
+
+
+def medido(funcao=None, *, nome=None):
+    """Decorator que mede cada chamada. Nome padrão: ``módulo.função`` sem o prefixo ``skyhawk.``."""
+    if funcao is None:
+        return functools.partial(medido, nome=nome)
+    nome = nome or f"{funcao.__module__.removeprefix('skyhawk.')}.{funcao.__qualname__}"
+
+    @functools.wraps(funcao)
+    def medida(*args, **kwargs):
+        with metricas.medir(nome):
+            return funcao(*args, **kwargs)
+
+    return medida
+
+
+# =============================================================================
+# PERFIL (cProfile) SOB DEMANDA
+# =============================================================================
+@contextlib.contextmanager
+def capturar_perfil(linhas=40):
+    """Roda o bloco sob cProfile. O dict devolvido recebe ``texto`` (top por tempo acumulado) e ``bruto`` ao sair."""
+    resultado = {}
+    perfil = cProfile.Profile()
+    perfil.enable()
+    try:
+        yield resultado
+    finally:
+        perfil.disable()
+        saida = io.StringIO()
+        pstats.Stats(perfil, stream=saida).sort_stats("cumulative").print_stats(linhas)
+        resultado["texto"] = saida.getvalue()
+        resultado["bruto"] = perfil
@@ -0,0 +1,54 @@
+import functools
+import html
+import os
+import re
+
+ARQUIVO_MODELO_PROPOSTA = os.path.join(os.path.dirname(os.path.abspath(__file__)), "proposta.html")
+
+_CAMPO = re.compile(r"\{\{(\w+)\}\}")
+
+
+@functools.lru_cache(maxsize=4096)
+def escapar(valor):
+    """``html.escape`` memorizado: nomes e unidades se repetem muito entre as linhas."""
+    return html.escape(str(valor))
+
+
+class ModeloHTML:
+    """Template HTML compilado uma vez: trechos estáticos intercalados com ``{{campos}}``.
+
+    Os valores são escapados com ``html.escape``; os campos em ``campos_html``
+    já chegam como HTML pronto e podem ser uma string ou um iterável de
+    pedaços (ex.: um gerador de linhas de tabela).
+    """
+
+    def __init__(self, texto, campos_html=()):
+        self.partes = _CAMPO.split(texto)
+        self.campos = frozenset(self.partes[1::2])
+        self.campos_html = frozenset(campos_html)
+
+    def gerar(self, valores):
+        """Documento em pedaços, na ordem, sem montar a string inteira."""
+        faltando = self.campos - valores.keys()
+        if faltando:
+            raise KeyError(f"Campos sem valor no modelo: {', '.join(sorted(faltando))}")
+        for indice, parte in enumerate(self.partes):
+            if indice % 2 == 0:
+                if parte:
+                    yield parte
+            elif parte not in self.campos_html:
+                yield escapar(valores[parte])
+            elif isinstance(valores[parte], str):
+                yield valores[parte]
+            else:
+                yield from valores[parte]
+
+    def renderizar(self, valores):
+        return "".join(self.gerar(valores))
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_modelo(caminho=ARQUIVO_MODELO_PROPOSTA, campos_html=()):
+    """Lê e compila o template uma única vez por processo."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        return ModeloHTML(arquivo.read(), campos_html)
@@ -0,0 +1,172 @@
+import zlib
+
+from fpdf import FPDF
+
+from skyhawk.ativos import inserir_imagem
+from skyhawk.config import ARQUIVO_LOGO
+
+COR_CABECALHO_TABELA = (0, 77, 64)
+ASSINATURAS = ("Diretoria SkyHawk Security", "Engenharia AmazingDrone", "De Acordo (Cliente)")
+
+
+class _SaidaArquivo:
+    """Ocupa o lugar do buffer ``str`` do FPDF, escrevendo direto no arquivo.
+
+    O FPDF só usa ``+=`` e ``len()`` no buffer (offsets do xref), então basta
+    contar os bytes gravados.
+    """
+
+    def __init__(self, arquivo):
+        self._arquivo = arquivo
+        self._tamanho = 0
+
+    def __iadd__(self, texto):
+        dados = texto.encode('latin-1')
+        self._arquivo.write(dados)
+        self._tamanho += len(dados)
+        return self
+
+    def __len__(self):
+        return self._tamanho
+
+
+class PDFFluxo(FPDF):
+    """FPDF que grava o documento em um arquivo binário enquanto é gerado.
+
+    Cada página é comprimida e gravada no arquivo assim que termina; só o
+    número do objeto fica guardado para a árvore de páginas, escrita no
+    fechamento. A memória acompanha a página atual, não o documento
+    inteiro. O cabeçalho vai antes da primeira página e é regravado no lugar
+    (o arquivo precisa aceitar ``seek``) se a versão do PDF subir depois.
+    Links internos e alias de número de páginas não são suportados.
+    """
+
+    def __init__(self, arquivo, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.buffer = _SaidaArquivo(arquivo)
+        self._arquivo = arquivo
+        self._inicio = arquivo.tell()
+        self._versao_cabecalho = None
+        self._objetos_paginas = []
+
+    def finalizar(self):
+        self.close()
+
+    def _tamanho_pagina_pt(self):
+        if self.def_orientation == 'P':
+            return self.fw_pt, self.fh_pt
+        return self.fh_pt, self.fw_pt
+
+    def _putheader(self):
+        if self._versao_cabecalho is None:
+            super()._putheader()
+        elif self._versao_cabecalho != self.pdf_version:
+            # "%PDF-1.x" tem sempre o mesmo tamanho: regrava sem deslocar os offsets
+            self._arquivo.seek(self._inicio)
+            self._arquivo.write(('%PDF-' + self.pdf_version).encode('latin-1'))
+            self._arquivo.seek(0, 2)
+        self._versao_cabecalho = self.pdf_version
+
+    def _endpage(self):
+        n = self.page
+        conteudo = zlib.compress(self.pages[n].encode('latin-1'))
+        super()._endpage()
+        self._putheader()
+        w_pt, h_pt = self._tamanho_pagina_pt()
+        self._newobj()
+        self._objetos_paginas.append(self.n)
+        self._out('<</Type /Page')
+        self._out('/Parent 1 0 R')
+        if n in self.orientation_changes:
+            self._out('/MediaBox [0 0 %.2f %.2f]' % (h_pt, w_pt))
+        self._out('/Resources 2 0 R')
+        if self.pdf_version > '1.3':
+            self._out('/Group <</Type /Group /S /Transparency /CS /DeviceRGB>>')
+        self._out('/Contents ' + str(self.n + 1) + ' 0 R>>')
+        self._out('endobj')
+        self._newobj()
+        self._out('<</Filter /FlateDecode /Length ' + str(len(conteudo)) + '>>')
+        self._putstream(conteudo)
+        self._out('endobj')
+        self.pages[n] = ''
+
+    def _putpages(self):
+        w_pt, h_pt = self._tamanho_pagina_pt()
+        self.offsets[1] = len(self.buffer)
+        self._out('1 0 obj')
+        self._out('<</Type /Pages')
+        self._out('/Kids [' + ''.join(str(objeto) + ' 0 R ' for objeto in self._objetos_paginas) + ']')
+        self._out('/Count ' + str(self.page))
+        self._out('/MediaBox [0 0 %.2f %.2f]' % (w_pt, h_pt))
+        self._out('>>')
+        self._out('endobj')
+
+
+# =============================================================================
+# LAYOUT COMPARTILHADO (TIMBRADO, ASSINATURAS, TABELAS)
+# =============================================================================
+def timbrado(pdf, titulo, subtitulo, tamanho_titulo=16, estilo_subtitulo='I'):
+    """Logo, título e subtítulo no topo da página atual; o cursor fica logo abaixo."""
+    # --- CORREÇÃO DE POSICIONAMENTO ---
+    # Logo em Y=10, largura 100; texto a partir de Y=65 (antes 50) para evitar sobreposição
+    inserir_imagem(pdf, ARQUIVO_LOGO, x=55, y=10, w=100)
+    pdf.set_y(65)
+
+    pdf.set_font("Arial", 'B', tamanho_titulo)
+    pdf.cell(0, 10, titulo, 0, 1, 'C')
+    pdf.set_font("Arial", estilo_subtitulo, 10)
+    pdf.cell(0, 5, subtitulo, 0, 1, 'C')
+    pdf.ln(10)
+
+
+def assinaturas(pdf, nomes=ASSINATURAS):
+    """Linhas de assinatura no rodapé da página atual."""
+    pdf.set_y(-45)
+    y_sig = pdf.get_y()
+    pdf.set_font("Arial", '', 8)
+    for n, nome in enumerate(nomes):
+        x = 10 + 65 * n
+        pdf.line(x, y_sig, x + 55, y_sig)
+        pdf.text(x + 5, y_sig + 5, nome)
+
+
+class Tabela:
+    """Tabela de colunas fixas com cabeçalho verde e linhas com borda.
+
+    ``colunas``: (título, largura, alinhamento) de cada coluna; o alinhamento
+    vale para o cabeçalho e para as linhas. O cabeçalho se repete no topo de
+    cada página nova.
+    """
+
+    def __init__(self, colunas, altura, fonte=("Arial", '', 8), fonte_cabecalho=("Arial", 'B', 8),
+                 altura_cabecalho=None):
+        self.colunas = tuple(tuple(coluna) for coluna in colunas)
+        self.altura = altura
+        self.altura_cabecalho = altura_cabecalho or altura
+        self.fonte = tuple(fonte)
+        self.fonte_cabecalho = tuple(fonte_cabecalho)
+
+    def cabecalho(self, pdf):
+        # Sem espaço até o gatilho de quebra, o cabeçalho vai para o topo da página seguinte
+        if pdf.y + self.altura_cabecalho > pdf.page_break_trigger and pdf.accept_page_break():
+            pdf.add_page(pdf.cur_orientation)
+        pdf.set_font(*self.fonte_cabecalho)
+        pdf.set_fill_color(*COR_CABECALHO_TABELA)
+        pdf.set_text_color(255, 255, 255)
+        ultima = len(self.colunas) - 1
+        for n, (titulo, largura, alinhamento) in enumerate(self.colunas):
+            pdf.cell(largura, self.altura_cabecalho, titulo, 1, 1 if n == ultima else 0, alinhamento, True)
+
+    def linhas(self, pdf, linhas):
+        """Desenha ``linhas`` (sequências de textos já formatados), quebrando página quando precisa."""
+        pdf.set_font(*self.fonte)
+        pdf.set_text_color(0, 0, 0)
+        ultima = len(self.colunas) - 1
+        for linha in linhas:
+            if pdf.y + self.altura > pdf.page_break_trigger and pdf.accept_page_break():
+                pdf.add_page(pdf.cur_orientation)
+                self.cabecalho(pdf)
+                pdf.set_font(*self.fonte)
+                pdf.set_text_color(0, 0, 0)
+            for n, ((_, largura, alinhamento), texto) in enumerate(zip(self.colunas, linha)):
+                pdf.cell(largura, self.altura, texto, 1, 1 if n == ultima else 0, alinhamento)
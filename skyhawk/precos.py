@@ -0,0 +1,118 @@
+import functools
+import json
+import os
+
+from skyhawk.carrinho import Carrinho, ItemCarrinho
+
+ARQUIVO_PRECOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tabela_precos.json")
+
+
+class Catalogo:
+    """Tabela de preços indexada por (serviço, modelo de contrato, duração)."""
+
+    def __init__(self, dados):
+        self.modelos = dados['modelos']
+        self.servicos = dados['servicos']
+        self.precos = {
+            (linha['servico'], linha['modelo'], int(linha['duracao'])): (float(linha['preco_base']), linha['rotulo'])
+            for linha in dados['precos']
+        }
+
+    def modelo_preco(self, contrato):
+        """Modelo de preço ("Comodato" ou "SaaS (Venda)") de um tipo de contrato da tela."""
+        try:
+            return self.modelos[contrato]
+        except KeyError:
+            return "Comodato" if "Comodato" in contrato else "SaaS (Venda)"
+
+    def preco_base(self, servico, contrato, duracao):
+        modelo = self.modelo_preco(contrato)
+        try:
+            preco, rotulo = self.precos[(servico, modelo, int(duracao))]
+        except KeyError:
+            raise ValueError(f"Sem preço de tabela para {servico} / {modelo} / {duracao} meses") from None
+        return modelo, preco, rotulo
+
+
+@functools.lru_cache(maxsize=None)
+def carregar_catalogo(caminho=ARQUIVO_PRECOS):
+    """Lê a tabela de preços uma única vez por processo (``carregar_catalogo.cache_clear()`` recarrega)."""
+    with open(caminho, encoding='utf-8') as arquivo:
+        return Catalogo(json.load(arquivo))
+
+
+# =============================================================================
+# ITENS DO CARRINHO
+# =============================================================================
+def _exigir_minimo(campo, valor, minimo):
+    """Os mesmos limites dos campos da tela; cotar/cotar_lote recebem entradas sem essa trava."""
+    if valor < minimo:
+        raise ValueError(f"{campo} deve ser no mínimo {minimo} (recebido: {valor})")
+
+
+def item_monitoramento(contrato, duracao, rondas_extras=0, catalogo=None):
+    _exigir_minimo("rondas_extras", rondas_extras, 0)
+    catalogo = catalogo or carregar_catalogo()
+    regras = catalogo.servicos["Monitoramento"]
+    tipo_preco, preco_base, label_duracao = catalogo.preco_base("Monitoramento", contrato, duracao)
+    valor_calc = preco_base + (rondas_extras * regras['preco_ronda_extra'])
+    qtd_tot = regras['rondas_inclusas'] + rondas_extras
+    return ItemCarrinho(f"Monitoramento {tipo_preco} ({label_duracao})", "Monitoramento", qtd_tot, regras['unidade'],
+                        valor_calc / qtd_tot, valor_calc, regras['empresa'])
+
+
+def item_volumetria(volumes, baterias, catalogo=None):
+    _exigir_minimo("volumes", volumes, 1)
+    _exigir_minimo("baterias", baterias, 1)
+    catalogo = catalogo or carregar_catalogo()
+    regras = catalogo.servicos["Volumetria"]
+    val = volumes * baterias * regras['preco_por_bateria']
+    return ItemCarrinho(f"Volumetria ({baterias} Bat)", "Volumetria", volumes, regras['unidade'], val / volumes, val,
+                        regras['empresa'])
+
+
+def item_avulso(servico, qtd, valor_unit, catalogo=None):
+    _exigir_minimo("qtd", qtd, 1)
+    _exigir_minimo("valor", valor_unit, 0)
+    catalogo = catalogo or carregar_catalogo()
+    regras = catalogo.servicos[servico]
+    return ItemCarrinho(servico, servico, qtd, regras['unidade'], valor_unit, qtd * valor_unit, regras['empresa'])
+
+
+def montar_item(contrato, duracao, especificacao, catalogo=None):
+    """Item de carrinho a partir de uma especificação declarativa.
+
+    Formatos aceitos: ``{"servico": "Monitoramento", "rondas_extras": 2}``,
+    ``{"servico": "Volumetria", "volumes": 1, "baterias": 4}`` e, para os
+    demais serviços, ``{"servico": "Inspeções", "qtd": 2, "valor": 1500.0}``.
+    """
+    servico = especificacao['servico']
+    if servico == "Monitoramento":
+        return item_monitoramento(contrato, duracao, int(especificacao.get('rondas_extras', 0)), catalogo)
+    if servico == "Volumetria":
+        return item_volumetria(int(especificacao.get('volumes', 1)), int(especificacao.get('baterias', 4)), catalogo)
+    if servico not in (catalogo or carregar_catalogo()).servicos:
+        raise ValueError(f"Serviço desconhecido: {servico}")
+    return item_avulso(servico, int(especificacao.get('qtd', 1)), float(especificacao.get('valor', 0.0)), catalogo)
+
+
+# =============================================================================
+# COTAÇÃO
+# =============================================================================
+def cotar(carrinho_spec, catalogo=None):
+    """Precifica um carrinho inteiro fora do Streamlit.
+
+    ``carrinho_spec``: ``{"contrato": ..., "duracao": 36, "itens": [especificações]}``
+    (ver montar_item). Retorna os itens montados e os totais por empresa.
+    """
+    catalogo = catalogo or carregar_catalogo()
+    contrato, duracao = carrinho_spec['contrato'], int(carrinho_spec['duracao'])
+    carrinho = Carrinho(montar_item(contrato, duracao, especificacao, catalogo) for especificacao in carrinho_spec['itens'])
+    total, fat_sky, fat_amz, empresa = carrinho.totais()
+    return {"itens": carrinho.itens, "total": total, "fat_sky": fat_sky, "fat_amz": fat_amz, "empresa": empresa}
+
+
+def cotar_lote(carrinhos_spec, catalogo=None):
+    """cotar() para uma sequência de carrinhos, com o catálogo resolvido uma única vez."""
+    catalogo = catalogo or carregar_catalogo()
+    return [cotar(carrinho_spec, catalogo) for carrinho_spec in carrinhos_spec]
@@ -0,0 +1,105 @@
+import os
+
+from skyhawk.ativos import get_image_base64
+from skyhawk.carrinho import servico_item
+from skyhawk.config import ARQUIVO_LOGO
+from skyhawk.metricas import medido
+from skyhawk.modelo_html import ARQUIVO_MODELO_PROPOSTA, carregar_modelo, escapar
+from skyhawk.precos import carregar_catalogo
+
+
+# =============================================================================
+# GERADOR DE PDF (LAYOUT COMPARTILHADO EM skyhawk.pdf)
+# =============================================================================
+COLUNAS_ITENS_PDF = (("Servico", 110, 'L'), ("Qtd", 30, 'C'), ("Total (R$)", 50, 'R'))
+
+
+@medido
+def gerar_proposta_pdf(cliente, contrato, duracao, carrinho, total, roi_data):
+    from fpdf import FPDF
+    from skyhawk.pdf import Tabela, assinaturas, timbrado
+    pdf = FPDF()
+    pdf.add_page()
+    timbrado(pdf, "PROPOSTA COMERCIAL INTEGRADA", "Amazing SkyHawk Holding")
+
+    pdf.set_font("Arial", 'B', 11)
+    pdf.cell(0, 8, f"Cliente: {cliente}", 0, 1)
+    pdf.set_font("Arial", '', 11)
+    pdf.cell(0, 8, f"Modalidade: {contrato} | Vigência: {duracao} meses", 0, 1)
+
+    pdf.ln(5)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.rect(10, pdf.get_y(), 190, 45, 'F')
+    pdf.set_xy(15, pdf.get_y() + 5)
+    pdf.set_font("Arial", 'B', 10)
+    pdf.cell(0, 6, "Analise de Viabilidade & Recomendacao:", 0, 1)
+    pdf.set_font("Arial", '', 9)
+    pdf.multi_cell(180, 5, roi_data['pdf_text'])
+
+    pdf.ln(15)
+    tabela = Tabela(COLUNAS_ITENS_PDF, 10, fonte=("Arial", '', 10), fonte_cabecalho=("Arial", 'B', 10))
+    tabela.cabecalho(pdf)
+    tabela.linhas(pdf, ((item['nome'][:55], f"{item['qtd']} {item['unidade']}", f"{item['valor_total']:,.2f}")
+                        for item in carrinho))
+
+    pdf.ln(5)
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, f"Total Mensal: R$ {total:,.2f}", 0, 1, 'R')
+    assinaturas(pdf)
+
+    return pdf.output(dest='S').encode('latin-1')
+
+
+# =============================================================================
+# GERADOR DE HTML (TEMPLATE COMPILADO)
+# =============================================================================
+CAMPOS_HTML_PROPOSTA = ("logo", "roi_texto", "itens")
+
+
+def _linhas_itens(carrinho, rondas_inclusas):
+    for item in carrinho:
+        desc_extra = ""
+        if servico_item(item) == "Monitoramento":
+            extras = item['qtd'] - rondas_inclusas
+            desc = f"(Base {rondas_inclusas} Rondas)"
+            if extras > 0: desc = f"(Base {rondas_inclusas} Rondas + {extras} Extras)"
+            desc_extra = f"<br><small>{desc}</small>"
+        yield (f"<tr><td>{escapar(item['nome'])} <small>({escapar(item['qtd'])} {escapar(item['unidade'])})</small>"
+               f"{desc_extra}</td><td style='text-align:right'>R$ {item['valor_total']:.2f}</td></tr>")
+
+
+def _logo_html():
+    img_b64 = get_image_base64(ARQUIVO_LOGO)
+    # O data URI vem pronto do registro de ativos e é emitido como um pedaço, sem cópia
+    return ('<img src="', img_b64, '" class="logo-img">') if img_b64 else ()
+
+
+def partes_proposta_html(cliente, contrato, duracao, carrinho, total, roi_data):
+    """Pedaços da proposta HTML, na ordem, para enviar ou gravar em fluxo."""
+    modelo = carregar_modelo(ARQUIVO_MODELO_PROPOSTA, CAMPOS_HTML_PROPOSTA)
+    rondas_inclusas = carregar_catalogo().servicos["Monitoramento"]['rondas_inclusas']
+    return modelo.gerar({
+        "logo": _logo_html(),
+        "cliente": cliente,
+        "contrato": contrato,
+        "duracao": duracao,
+        "roi_titulo": roi_data['titulo'],
+        "roi_texto": roi_data['texto'],
+        "itens": _linhas_itens(carrinho, rondas_inclusas),
+        "total": f"{total:,.2f}",
+    })
+
+
+@medido
+def gerar_proposta_html(cliente, contrato, duracao, carrinho, total, roi_data):
+    return "".join(partes_proposta_html(cliente, contrato, duracao, carrinho, total, roi_data))
+
+
+@medido
+def escrever_proposta_html(destino, cliente, contrato, duracao, carrinho, total, roi_data):
+    """Grava a proposta em ``destino`` (caminho ou arquivo de texto aberto) pedaço a pedaço."""
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'w', encoding='utf-8') as arquivo:
+            return escrever_proposta_html(arquivo, cliente, contrato, duracao, carrinho, total, roi_data)
+    destino.writelines(partes_proposta_html(cliente, contrato, duracao, carrinho, total, roi_data))
+    return destino
@@ -0,0 +1,194 @@
+import datetime
+import glob
+import hashlib
+import os
+import tempfile
+
+from skyhawk.banco import carregar_resumo, instantaneo, iterar_lotes, obter_banco
+from skyhawk.fiscal import calcular_cenarios_fiscais_detalhado
+from skyhawk.metricas import medido
+from skyhawk.tarefas import CONCLUIDA, fila_tarefas
+
+TAMANHO_LOTE = 2000
+
+SQL_DETALHE = """
+    SELECT id, cliente, tipo_contrato, valor_total, fat_skyhawk, fat_amazing
+    FROM propostas ORDER BY id
+"""
+COLUNAS_DETALHE = (("ID", 10, 'C'), ("Cliente", 50, 'C'), ("Contrato", 25, 'C'), ("Total", 30, 'C'),
+                   ("Fat. Sky", 37.5, 'C'), ("Fat. Amz", 37.5, 'C'))
+
+
+# =============================================================================
+# RELATÓRIO GERAL CONSOLIDADO
+# =============================================================================
+def _formatar_lote(df):
+    """Converte um lote de contratos nas colunas de texto da tabela, sem iterar linha a linha."""
+    moeda = '{:,.2f}'.format
+    return (
+        df['id'].astype(str),
+        df['cliente'].astype(str).str[:25],
+        df['tipo_contrato'].astype(str).str.split(' ', n=1).str[0],
+        df['valor_total'].map(moeda),
+        df['fat_skyhawk'].map(moeda),
+        df['fat_amazing'].map(moeda),
+    )
+
+
+def _cabecalho(pdf, resumo, tabela):
+    from skyhawk.pdf import timbrado
+    pdf.add_page()
+    timbrado(pdf, "RELATÓRIO GERAL DE INTELIGÊNCIA",
+             f"Data: {datetime.datetime.now().strftime('%d/%m/%Y')} | Holding Consolidada",
+             tamanho_titulo=18, estilo_subtitulo='')
+
+    total_geral = resumo['total_geral']
+    total_sky = resumo['total_skyhawk']
+    total_amz = resumo['total_amazing']
+
+    analise_sky = calcular_cenarios_fiscais_detalhado(total_sky, "Seguranca")
+    analise_amz = calcular_cenarios_fiscais_detalhado(total_amz, "Engenharia")
+
+    pdf.set_fill_color(240, 240, 240)
+    pdf.rect(10, pdf.get_y(), 190, 30, 'F')
+    y_start = pdf.get_y()
+
+    pdf.set_xy(10, y_start + 5)
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(63, 10, "FATURAMENTO HOLDING", 0, 0, 'C')
+    pdf.cell(63, 10, "SKYHAWK", 0, 0, 'C')
+    pdf.cell(63, 10, "AMAZING", 0, 1, 'C')
+
+    pdf.set_font("Arial", 'B', 14)
+    pdf.set_text_color(0, 77, 64)
+    pdf.cell(63, 10, f"R$ {total_geral:,.2f}", 0, 0, 'C')
+    pdf.set_text_color(0, 0, 0)
+    pdf.cell(63, 10, f"R$ {total_sky:,.2f}", 0, 0, 'C')
+    pdf.cell(63, 10, f"R$ {total_amz:,.2f}", 0, 1, 'C')
+    pdf.ln(15)
+
+    pdf.set_font("Arial", 'B', 14)
+    pdf.cell(0, 10, "ESTRATEGIA TRIBUTARIA E ELISAO FISCAL", 0, 1, 'L')
+    pdf.ln(2)
+
+    pdf.set_fill_color(224, 242, 241)
+    pdf.rect(10, pdf.get_y(), 190, 55, 'F')
+    pdf.set_xy(15, pdf.get_y() + 5)
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 6, f"1. SKYHAWK SECURITY (Recorrencia: R$ {total_sky:,.2f}/mes)", 0, 1)
+    pdf.set_font("Arial", '', 9)
+    pdf.cell(0, 5,
+             f"Estimativa Anual: R$ {analise_sky['faturamento_anual']:,.2f} | Regime: {analise_sky['regime_provavel']}",
+             0, 1)
+    pdf.ln(2)
+    pdf.set_font("Arial", 'B', 9)
+    pdf.cell(0, 5, "Analise de Otimizacao:", 0, 1)
+    pdf.set_font("Arial", '', 9)
+    for dica in analise_sky['dicas']:
+        pdf.multi_cell(180, 5, f"- {dica}")
+    pdf.ln(5)
+
+    pdf.set_fill_color(255, 243, 224)
+    pdf.rect(10, pdf.get_y(), 190, 55, 'F')
+    pdf.set_xy(15, pdf.get_y() + 5)
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 6, f"2. AMAZING DRONE SOLUTIONS (Recorrencia: R$ {total_amz:,.2f}/mes)", 0, 1)
+    pdf.set_font("Arial", '', 9)
+    pdf.cell(0, 5,
+             f"Estimativa Anual: R$ {analise_amz['faturamento_anual']:,.2f} | Regime: {analise_amz['regime_provavel']}",
+             0, 1)
+    pdf.ln(2)
+    pdf.set_font("Arial", 'B', 9)
+    pdf.cell(0, 5, "Analise de Otimizacao (Fator R):", 0, 1)
+    pdf.set_font("Arial", '', 9)
+    for dica in analise_amz['dicas']:
+        pdf.multi_cell(180, 5, f"- {dica}")
+
+    pdf.ln(10)
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 10, "Detalhamento de Contratos", 0, 1, 'L')
+    tabela.cabecalho(pdf)
+
+
+@medido
+def gerar_relatorio_geral_completo_pdf(destino, tamanho_lote=TAMANHO_LOTE, progresso=None):
+    """Gera o relatório consolidado em ``destino`` (caminho ou arquivo binário aberto).
+
+    Os contratos são lidos do SQLite em lotes pelo cursor e as páginas vão
+    para o destino à medida que ficam prontas, então a memória não cresce com
+    o histórico. ``progresso(fracao)`` é chamado a cada lote.
+    """
+    if isinstance(destino, (str, os.PathLike)):
+        with open(destino, 'wb') as arquivo:
+            gerar_relatorio_geral_completo_pdf(arquivo, tamanho_lote, progresso)
+        return destino
+
+    from skyhawk.pdf import PDFFluxo, Tabela
+
+    with instantaneo() as conn:
+        pdf = PDFFluxo(destino)
+        tabela = Tabela(COLUNAS_DETALHE, 8)
+        resumo = carregar_resumo(conn)
+        _cabecalho(pdf, resumo, tabela)
+
+        feitos = 0
+        for lote in iterar_lotes(conn, SQL_DETALHE, tamanho_lote=tamanho_lote):
+            tabela.linhas(pdf, zip(*_formatar_lote(lote)))
+            feitos += len(lote)
+            if progresso:
+                progresso(feitos / max(resumo['qtd_propostas'], 1))
+
+    pdf.finalizar()
+    destino.flush()
+    return destino
+
+
+def _prefixo_relatorio_geral(pasta):
+    banco = hashlib.sha1(os.path.abspath(obter_banco().caminho).encode()).hexdigest()[:10]
+    return os.path.join(pasta, f"skyhawk_relatorio_geral_{banco}_")
+
+
+def caminho_relatorio_geral(pasta=None):
+    """Onde fica o relatório do estado atual do banco (muda quando entram vendas novas)."""
+    prefixo = _prefixo_relatorio_geral(pasta or tempfile.gettempdir())
+    return f"{prefixo}{datetime.date.today():%Y%m%d}_{carregar_resumo()['qtd_propostas']}.pdf"
+
+
+def relatorio_geral_atualizado(pasta=None, progresso=None):
+    """Caminho do relatório consolidado em disco, regerado apenas quando entram vendas novas."""
+    pasta = pasta or tempfile.gettempdir()
+    prefixo = _prefixo_relatorio_geral(pasta)
+    caminho = caminho_relatorio_geral(pasta)
+    if os.path.exists(caminho):
+        return caminho
+
+    fd, parcial = tempfile.mkstemp(suffix=".parcial", dir=pasta)
+    try:
+        with os.fdopen(fd, 'wb') as arquivo:
+            gerar_relatorio_geral_completo_pdf(arquivo, progresso=progresso)
+        os.replace(parcial, caminho)
+    except BaseException:
+        os.unlink(parcial)
+        raise
+
+    for antigo in glob.glob(f"{prefixo}*.pdf"):
+        if antigo != caminho:
+            try:
+                os.remove(antigo)
+            except OSError:
+                pass
+    return caminho
+
+
+def enviar_relatorio_geral(pasta=None):
+    """Tarefa em segundo plano do relatório geral; reaproveita o PDF pronto até entrarem vendas novas."""
+    caminho = caminho_relatorio_geral(pasta)
+    chave = ("relatorio_geral", caminho)
+    if os.path.exists(caminho):
+        return fila_tarefas.concluida(chave, caminho)
+    tarefa = fila_tarefas.enviar(chave, relatorio_geral_atualizado, pasta)
+    if tarefa.estado == CONCLUIDA and not os.path.exists(tarefa.resultado):
+        # O arquivo sumiu da pasta temporária: gera de novo
+        fila_tarefas.descartar(chave)
+        tarefa = fila_tarefas.enviar(chave, relatorio_geral_atualizado, pasta)
+    return tarefa
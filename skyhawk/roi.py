@@ -0,0 +1,132 @@
+import numpy as np
+
+from skyhawk.metricas import medido
+
+CUSTO_EQUIPAMENTO = 160000.00
+GAP_MENSAL_ECONOMIA = 8000.00
+DURACOES = (12, 24, 36, 48, 60)
+
+
+# =============================================================================
+# MOTOR VETORIZADO
+# =============================================================================
+@medido
+def simular_roi(custo_equipamento, gap_mensal, duracao):
+    """Payback e saldo da compra do equipamento, com broadcasting do NumPy.
+
+    Aceita escalares ou arrays em qualquer combinação de formatos compatíveis.
+    ``saldo_projetado`` é a economia ao fim da vigência (negativo = prejuízo).
+    """
+    custo = np.asarray(custo_equipamento, dtype=float)
+    gap = np.asarray(gap_mensal, dtype=float)
+    duracao = np.asarray(duracao, dtype=float)
+    with np.errstate(divide='ignore'):
+        meses_payback = np.where(gap > 0, custo / gap, np.inf)
+    meses_lucro = duracao - meses_payback
+    return {
+        'meses_payback': meses_payback,
+        'meses_lucro': meses_lucro,
+        'saldo_projetado': meses_lucro * gap,
+        'viavel': meses_lucro > 0,
+    }
+
+
+@medido
+def grade_roi(custos, gaps, duracoes=DURACOES):
+    """Todas as combinações (custo, gap, duração) em uma única passada vetorizada."""
+    import pandas as pd
+    custo, gap, duracao = np.meshgrid(np.asarray(custos, dtype=float), np.asarray(gaps, dtype=float),
+                                      np.asarray(duracoes, dtype=float), indexing='ij')
+    resultado = simular_roi(custo, gap, duracao)
+    return pd.DataFrame({
+        'custo_equipamento': custo.ravel(),
+        'gap_mensal': gap.ravel(),
+        'duracao': duracao.ravel().astype(int),
+        **{coluna: valores.ravel() for coluna, valores in resultado.items()},
+    })
+
+
+def superficie_roi(grade, valor='saldo_projetado', duracao=None):
+    """Pivot custo x gap de uma coluna da grade (uma duração, ou payback, que não depende dela)."""
+    if duracao is not None:
+        grade = grade[grade['duracao'] == duracao]
+    return grade.pivot_table(index='custo_equipamento', columns='gap_mensal', values=valor)
+
+
+@medido
+def monte_carlo_roi(duracoes=DURACOES, custo_equipamento=CUSTO_EQUIPAMENTO, gap_medio=GAP_MENSAL_ECONOMIA,
+                    gap_desvio=2000.0, custo_desvio=0.0, n_amostras=20000, semente=None):
+    """Distribuição do resultado quando o gap mensal (e opcionalmente o custo) é incerto.
+
+    Sorteia ``n_amostras`` cenários normais (gap truncado acima de zero) e avalia
+    todas as durações de uma vez. Retorna um DataFrame por duração com a
+    probabilidade de break-even e percentis de payback e saldo.
+    """
+    import pandas as pd
+    rng = np.random.default_rng(semente)
+    gap = np.maximum(rng.normal(gap_medio, gap_desvio, n_amostras), 1.0)[:, None]
+    custo = np.maximum(rng.normal(custo_equipamento, custo_desvio, n_amostras), 0.0)[:, None]
+    duracoes = np.asarray(duracoes, dtype=float)[None, :]
+    resultado = simular_roi(custo, gap, duracoes)
+
+    saldo = resultado['saldo_projetado']
+    payback = resultado['meses_payback'][:, 0]
+    p5, p50, p95 = np.percentile(saldo, [5, 50, 95], axis=0)
+    return pd.DataFrame({
+        'duracao': duracoes[0].astype(int),
+        'prob_break_even': resultado['viavel'].mean(axis=0),
+        'payback_p50': np.percentile(payback, 50),
+        'payback_p95': np.percentile(payback, 95),
+        'saldo_medio': saldo.mean(axis=0),
+        'saldo_p5': p5,
+        'saldo_p50': p50,
+        'saldo_p95': p95,
+    })
+
+
+# =============================================================================
+# ANÁLISE PARA A PROPOSTA
+# =============================================================================
+@medido
+def gerar_analise_roi(contrato_escolhido, total_mensal_escolhido, duracao,
+                      custo_equipamento=CUSTO_EQUIPAMENTO, gap_mensal_economia=GAP_MENSAL_ECONOMIA):
+    analise = {}
+    resultado = simular_roi(custo_equipamento, gap_mensal_economia, duracao)
+    meses_payback = float(resultado['meses_payback'])
+    custo_k = f"R$ {custo_equipamento / 1000:,.0f}k"
+
+    if "Venda" in contrato_escolhido:
+        if resultado['viavel']:
+            lucro_projetado = float(resultado['saldo_projetado'])
+            titulo = f"💰 Decisão Lucrativa: Economia de R$ {lucro_projetado:,.2f}"
+            texto_pdf = (
+                f"ANÁLISE DE LUCRO REAL: Esta modalidade é a mais rentável para {duracao} meses. "
+                f"O equipamento se paga no mês {int(meses_payback)}. Economia direta de R$ {lucro_projetado:,.2f}."
+            )
+        else:
+            titulo = "⚠️ Alerta de Viabilidade Financeira"
+            texto_pdf = (
+                f"ANÁLISE CRÍTICA: Para {duracao} meses, a aquisição não atinge o break-even ({int(meses_payback)} meses). "
+                "Comodato é mais seguro."
+            )
+        texto_html = f"<p style='color:#1b5e20'><b>{titulo}</b></p><p>{texto_pdf}</p>"
+    else:
+        if duracao >= 36:
+            lucro_perdido = float(resultado['saldo_projetado'])
+            titulo = "ℹ️ Análise Comparativa: Comodato vs Compra"
+            texto_pdf = (
+                f"ANÁLISE DE CENÁRIO: Comodato é seguro (Zero CAPEX). "
+                f"Porém, na Compra, o equipamento se pagaria no mês {int(meses_payback)}, gerando economia de R$ {lucro_perdido:,.2f}."
+            )
+        else:
+            titulo = "✅ Comodato: A Melhor Escolha para este Prazo"
+            texto_pdf = (
+                f"VEREDICTO: Para {duracao} meses, o Comodato é a única opção viável, "
+                f"evitando imobilização de {custo_k} sem retorno."
+            )
+        texto_html = f"<p style='color:#1b5e20'><b>{titulo}</b></p><p>{texto_pdf}</p>"
+
+    analise['titulo'] = titulo
+    analise['texto'] = texto_html
+    analise['pdf_text'] = texto_pdf
+    return analise
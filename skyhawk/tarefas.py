@@ -0,0 +1,108 @@
+import concurrent.futures
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+
+TRABALHADORES_PADRAO = 1
+
+PENDENTE = "pendente"
+EXECUTANDO = "executando"
+CONCLUIDA = "concluída"
+ERRO = "erro"
+
+
+@dataclass
+class Tarefa:
+    chave: tuple
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    estado: str = PENDENTE
+    progresso: float = 0.0
+    resultado: object = None
+    erro: str = None
+    criada_em: float = field(default_factory=time.time)
+    concluida_em: float = None
+
+    @property
+    def terminada(self):
+        return self.estado in (CONCLUIDA, ERRO)
+
+
+class FilaTarefas:
+    """Pool de trabalho em segundo plano para documentos pesados.
+
+    Pedidos com a mesma ``chave`` compartilham uma única tarefa enquanto ela
+    está na fila, rodando ou terminada; uma tarefa com erro só é refeita
+    depois de ``descartar`` (nova tentativa pedida pelo usuário). A chave deve
+    mudar quando o resultado fica obsoleto (ex.: entra uma venda), e as
+    tarefas terminadas do mesmo tipo (``chave[0]``) com chave antiga são
+    descartadas quando uma nova é enviada.
+    """
+
+    def __init__(self, trabalhadores=TRABALHADORES_PADRAO):
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=trabalhadores,
+                                                               thread_name_prefix="skyhawk-tarefa")
+        self._por_chave = {}
+        self._por_id = {}
+        self._lock = threading.Lock()
+
+    def enviar(self, chave, funcao, *args, **kwargs):
+        """Tarefa da chave, criando-a se preciso. ``funcao`` recebe ``progresso=`` (fração de 0 a 1)."""
+        with self._lock:
+            tarefa = self._por_chave.get(chave)
+            if tarefa is not None:
+                return tarefa
+            tarefa = self._registrar(chave)
+        self._executor.submit(self._executar, tarefa, funcao, args, kwargs)
+        return tarefa
+
+    def concluida(self, chave, resultado):
+        """Registra um resultado já disponível (ex.: artefato em disco) sem passar pelo pool."""
+        with self._lock:
+            tarefa = self._por_chave.get(chave)
+            if tarefa is not None and tarefa.estado == CONCLUIDA:
+                return tarefa
+            tarefa = self._registrar(chave)
+        tarefa.progresso, tarefa.resultado = 1.0, resultado
+        tarefa.estado, tarefa.concluida_em = CONCLUIDA, time.time()
+        return tarefa
+
+    def obter(self, id_tarefa):
+        return self._por_id.get(id_tarefa)
+
+    def descartar(self, chave):
+        with self._lock:
+            tarefa = self._por_chave.pop(chave, None)
+            if tarefa is not None:
+                self._por_id.pop(tarefa.id, None)
+
+    def _registrar(self, chave):
+        for antiga in [t for c, t in self._por_chave.items() if c[0] == chave[0] and c != chave and t.terminada]:
+            del self._por_chave[antiga.chave]
+            self._por_id.pop(antiga.id, None)
+        anterior = self._por_chave.get(chave)
+        if anterior is not None:
+            self._por_id.pop(anterior.id, None)
+        tarefa = Tarefa(chave)
+        self._por_chave[chave] = tarefa
+        self._por_id[tarefa.id] = tarefa
+        return tarefa
+
+    def _executar(self, tarefa, funcao, args, kwargs):
+        tarefa.estado = EXECUTANDO
+
+        def progresso(fracao):
+            tarefa.progresso = max(0.0, min(1.0, float(fracao)))
+
+        try:
+            tarefa.resultado = funcao(*args, progresso=progresso, **kwargs)
+        except Exception as erro:
+            tarefa.erro = f"{type(erro).__name__}: {erro}"
+            tarefa.estado = ERRO
+        else:
+            tarefa.progresso = 1.0
+            tarefa.estado = CONCLUIDA
+        tarefa.concluida_em = time.time()
+
+
+fila_tarefas = FilaTarefas()
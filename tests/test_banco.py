@@ -0,0 +1,66 @@
+import datetime
+
+import pytest
+
+from skyhawk import banco
+
+
+def _venda(numero):
+    valor = float(numero % 13 * 100)
+    return {"cliente": f"Cliente {numero % 17:02d}", "contrato": ("Anual", "Mensal", "Piloto")[numero % 3],
+            "duracao": 12, "servicos": "Monitoramento", "total": valor, "fat_amz": 0.0, "fat_sky": valor,
+            "empresa": "SkyHawk Security", "itens": [],
+            "registrado_em": datetime.datetime(2024, 1, 1) + datetime.timedelta(hours=numero * 7)}
+
+
+@pytest.fixture
+def banco_teste(tmp_path):
+    with banco.usar_arquivo(str(tmp_path / "banco.db")) as instancia:
+        banco.init_db()
+        banco.salvar_vendas_lote([_venda(numero) for numero in range(1, 121)])
+        with instancia.transacao() as conn:
+            conn.execute("UPDATE propostas SET valor_total = NULL WHERE id % 11 = 0")
+            conn.execute("UPDATE propostas SET cliente = NULL WHERE id % 19 = 0")
+        yield instancia
+
+
+def _todas_as_paginas(**filtros):
+    ids, cursor = [], None
+    while True:
+        pagina, cursor = banco.listar_propostas(apos=cursor, tamanho_pagina=7, **filtros)
+        ids += pagina['id'].tolist()
+        if cursor is None:
+            return ids
+
+
+def _ordem_sqlite(banco_teste, ordenar_por, decrescente, where=""):
+    with banco_teste.leitura() as conn:
+        linhas = conn.execute(f"SELECT {ordenar_por}, id FROM propostas {where}").fetchall()
+    # NULL vem antes de qualquer valor, como no índice do SQLite
+    linhas.sort(key=lambda linha: (linha[0] is not None, linha[0] or 0, linha[1]), reverse=decrescente)
+    return [id_ for _, id_ in linhas]
+
+
+@pytest.mark.parametrize("ordenar_por", banco.ORDENACOES)
+@pytest.mark.parametrize("decrescente", [True, False])
+def test_paginacao_percorre_todas_as_linhas_inclusive_as_nulas(banco_teste, ordenar_por, decrescente):
+    assert _todas_as_paginas(ordenar_por=ordenar_por, decrescente=decrescente) == \
+        _ordem_sqlite(banco_teste, ordenar_por, decrescente)
+    assert _todas_as_paginas(ordenar_por=ordenar_por, decrescente=decrescente, tipo_contrato="Mensal") == \
+        _ordem_sqlite(banco_teste, ordenar_por, decrescente, "WHERE tipo_contrato = 'Mensal'")
+
+
+def test_lote_indexa_a_busca_e_mantem_o_gatilho(banco_teste):
+    if not banco_teste.busca_cliente:
+        pytest.skip("SQLite sem FTS5 trigram")
+    pagina, _ = banco.listar_propostas(cliente="ente 03", tamanho_pagina=500)
+    assert len(pagina) == 7 and set(pagina['cliente']) == {"Cliente 03"}
+    banco.salvar_venda("Cliente Novo", "Anual", 12, "Monitoramento", 10.0, 0.0, 10.0, "SkyHawk Security")
+    pagina, _ = banco.listar_propostas(cliente="nte Nov")
+    assert pagina['cliente'].tolist() == ["Cliente Novo"]
+
+
+def test_tipos_de_contrato_sao_recalculados_depois_de_uma_escrita(banco_teste):
+    assert banco.tipos_contrato() == ["Anual", "Mensal", "Piloto"]
+    banco.salvar_venda("ACME", "Trimestral", 3, "Monitoramento", 10.0, 0.0, 10.0, "SkyHawk Security")
+    assert banco.tipos_contrato() == ["Anual", "Mensal", "Piloto", "Trimestral"]
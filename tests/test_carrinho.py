@@ -0,0 +1,12 @@
+from skyhawk.carrinho import EMPRESA_AMAZING, EMPRESA_SKYHAWK, calcular_totais, servico_item
+
+
+def test_totais_e_tipo_de_servico_usam_a_mesma_classificacao():
+    itens = [{"nome": "Monitoramento (12 rondas)", "valor_total": 100.0},
+             {"nome": "Plano Monitoramento", "valor_total": 50.0},
+             {"nome": "Inspeções", "servico": "Monitoramento", "valor_total": 25.0}]
+    total, fat_sky, fat_amz, _ = calcular_totais(itens)
+    assert (total, fat_sky, fat_amz) == (175.0, 125.0, 50.0)
+    assert [servico_item(item) for item in itens] == ["Monitoramento", "Plano Monitoramento", "Monitoramento"]
+    assert calcular_totais(itens[1:2])[3] == EMPRESA_AMAZING
+    assert calcular_totais(itens[:1])[3] == EMPRESA_SKYHAWK
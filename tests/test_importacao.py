@@ -0,0 +1,39 @@
+import io
+import os
+
+import pytest
+
+from skyhawk.banco import usar_arquivo
+from skyhawk.importacao import importar_contratos, validar_linha
+from skyhawk.relatorios import gerar_relatorio_geral_completo_pdf
+
+CABECALHO = "cliente;contrato;duracao;data;servico;valor_total\n"
+
+
+def _csv(*linhas):
+    return io.BytesIO((CABECALHO + "".join(linha + "\n" for linha in linhas)).encode('utf-8'))
+
+
+def test_aspas_tipograficas_viram_ascii_e_o_relatorio_pdf_e_gerado(tmp_path):
+    origem = _csv("“Acme” Ltda – Filial;Anual;12;01/02/2024;Plano Monitoramento;1.200,00")
+    with usar_arquivo(str(tmp_path / "banco.db")):
+        resultado = importar_contratos(origem, nome="historico.csv")
+        assert resultado['importados'] == 1
+        assert resultado['rejeitadas'] == []
+        destino = tmp_path / "relatorio.pdf"
+        gerar_relatorio_geral_completo_pdf(str(destino))
+    assert os.path.getsize(destino) > 0
+
+
+def test_texto_fora_do_latin1_e_rejeitado_com_motivo():
+    linha = {"cliente": "Acme 東京", "contrato": "Anual", "duracao": "12",
+             "data": "01/02/2024", "servico": "Plano Monitoramento", "valor_total": "100"}
+    with pytest.raises(ValueError, match="cliente com caractere"):
+        validar_linha(linha)
+
+
+def test_acentos_e_ordinais_do_latin1_sao_mantidos():
+    linha = {"cliente": "José Nº 1", "contrato": "Anual", "duracao": "12",
+             "data": "01/02/2024", "servico": "Plano Monitoramento", "valor_total": "100"}
+    (cliente, *_), _ = validar_linha(linha)
+    assert cliente == "José Nº 1"
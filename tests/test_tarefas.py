@@ -0,0 +1,65 @@
+import os
+import threading
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from skyhawk import relatorios
+from skyhawk.banco import salvar_venda, usar_arquivo
+from skyhawk.tarefas import ERRO, FilaTarefas, fila_tarefas
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Amazing_Hawk_Inteligence.py")
+
+
+def _esperar(tarefa, limite=10.0):
+    fim = time.monotonic() + limite
+    while not tarefa.terminada and time.monotonic() < fim:
+        time.sleep(0.01)
+    assert tarefa.terminada
+
+
+def test_tarefa_com_erro_nao_e_reenviada_ate_ser_descartada():
+    fila = FilaTarefas()
+    chamadas = []
+
+    def falhar(progresso=None):
+        chamadas.append(threading.current_thread().name)
+        raise RuntimeError("disco cheio")
+
+    tarefa = fila.enviar(("relatorio", 1), falhar)
+    _esperar(tarefa)
+    for _ in range(3):
+        assert fila.enviar(("relatorio", 1), falhar) is tarefa
+    assert tarefa.estado == ERRO and len(chamadas) == 1
+
+    fila.descartar(("relatorio", 1))
+    nova = fila.enviar(("relatorio", 1), falhar)
+    _esperar(nova)
+    assert nova is not tarefa and len(chamadas) == 2
+
+
+def test_erro_do_relatorio_geral_continua_na_tela_entre_reexecucoes(tmp_path, monkeypatch):
+    chamadas = []
+
+    def falhar(pasta=None, progresso=None):
+        chamadas.append(pasta)
+        raise RuntimeError("disco cheio")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(relatorios, "relatorio_geral_atualizado", falhar)
+    with usar_arquivo(str(tmp_path / "banco.db")):
+        salvar_venda("ACME", "Anual", 12, "Plano Monitoramento", 1000.0, 0.0, 1000.0, "SkyHawk")
+        app = AppTest.from_file(APP, default_timeout=60).run()
+        app.sidebar.radio[0].set_value("Relatórios Gerenciais").run()
+        _esperar(relatorios.enviar_relatorio_geral())
+
+        for _ in range(3):
+            app.run()
+            assert not app.exception
+            assert any("disco cheio" in erro.value for erro in app.error)
+        assert len(chamadas) == 1
+
+        next(botao for botao in app.button if botao.label == "🔄 Tentar novamente").click().run()
+        _esperar(relatorios.enviar_relatorio_geral())
+        assert len(chamadas) == 2
+        fila_tarefas.descartar(("relatorio_geral", relatorios.caminho_relatorio_geral()))